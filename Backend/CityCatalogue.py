@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Callable, Final, Iterable
+import json
+import os
+import time
+
+from CityIndex import CityIndex, normalize
+from Gazetteer import COUNTRY_CODES
+from PreparedResponse import PreparedResponse
+
+REFRESH_SECONDS: Final[int] = 24 * 3600
+RETRY_SECONDS: Final[int] = 60
+
+@dataclass
+class _Country:
+    ready: Event = field(default_factory=Event)
+    cities: list[str] = field(default_factory=list)
+    names: frozenset[str] = frozenset()
+    index: CityIndex | None = None
+    response: PreparedResponse | None = None
+    loaded_at: float = 0
+    refreshing: bool = False
+    failed_at: float = 0
+    error: str | None = None
+
+class CityCatalogue:
+    '''
+        City lists per country, loaded lazily and never fetched on a request thread.
+
+        The first time a country is asked for, its JSON snapshot (if any) is read from disk and
+        indexed right away; the upstream list is then fetched by a background thread, which
+        swaps in the new list and rewrites the snapshot. Readers get whatever is ready, wait at
+        most `timeout` seconds for a first load, and see None while nothing is available.
+        A failed fetch is retried no sooner than RETRY_SECONDS later.
+
+        Only the `countries` allowlist (plus anything `put` explicitly) is ever loaded: other
+        names get no entry and no fetch, so callers cannot grow the catalogue from a URL.
+    '''
+
+    def __init__(self, fetch: Callable[[str], list[str]], snapshot_dir: Path,
+                 refresh_seconds: int = REFRESH_SECONDS, clock = time.time,
+                 countries: Iterable[str] = COUNTRY_CODES):
+        self._fetch = fetch
+        self.countries = {self._key(country) for country in countries}
+        self.snapshot_dir = Path(snapshot_dir)
+        self.refresh_seconds = refresh_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._countries: dict[str, _Country] = {}
+
+    @staticmethod
+    def _key(country: str) -> str:
+        return country.strip().lower()
+
+    def supports(self, country: str) -> bool:
+        return self._key(country) in self.countries
+
+    def _snapshot_path(self, key: str) -> Path:
+        return self.snapshot_dir / f'{key}.json'
+
+    def _read_snapshot(self, key: str, entry: _Country):
+        path = self._snapshot_path(key)
+        try:
+            cities = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        self._install(entry, cities, path.stat().st_mtime)
+
+    def _write_snapshot(self, key: str, cities: list[str]):
+        path = self._snapshot_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f'.{os.getpid()}.tmp')
+        temporary.write_text(json.dumps(cities, ensure_ascii=False), encoding='utf-8')
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _install(entry: _Country, cities: list[str], loaded_at: float):
+        entry.index = CityIndex(cities)
+        entry.response = PreparedResponse.from_json({'status': 'success', 'content': cities})
+        entry.names = frozenset(normalize(city) for city in cities)
+        entry.cities = cities
+        entry.loaded_at = loaded_at
+        entry.ready.set()
+
+    def _entry(self, key: str) -> _Country:
+        with self._lock:
+            entry = self._countries.get(key)
+            if entry is not None:
+                return entry
+            entry = self._countries[key] = _Country()
+
+        self._read_snapshot(key, entry)
+        return entry
+
+    def _refresh(self, key: str, entry: _Country):
+        try:
+            cities = self._fetch(key)
+            self._install(entry, cities, self._clock())
+            entry.error = None
+            self._write_snapshot(key, cities)
+        except Exception as e:
+            entry.failed_at = self._clock()
+            entry.error = str(e)
+        finally:
+            with self._lock:
+                entry.refreshing = False
+
+    def ensure(self, country: str, force: bool = False) -> _Country | None:
+        '''
+            Load the snapshot if this is the first use of country, and start a background
+            refresh when the list is missing or stale (or force is set). None for a country
+            outside the allowlist.
+        '''
+        key = self._key(country)
+        if key not in self.countries:
+            return None
+        entry = self._entry(key)
+        now = self._clock()
+        with self._lock:
+            stale = force or now - entry.loaded_at > self.refresh_seconds
+            if not stale or entry.refreshing or (not force and now - entry.failed_at < RETRY_SECONDS):
+                return entry
+            entry.refreshing = True
+
+        Thread(target = self._refresh, args = (key, entry), daemon = True).start()
+        return entry
+
+    def get(self, country: str, timeout: float = 0) -> list[str] | None:
+        entry = self.ensure(country)
+        if entry is None or not entry.ready.wait(timeout):
+            return None
+        return entry.cities
+
+    def index(self, country: str) -> CityIndex | None:
+        entry = self.ensure(country)
+        return entry.index if entry is not None else None
+
+    def contains(self, country: str | None, city: str) -> bool:
+        '''
+            Whether city is on the loaded list of country. False while the list is loading.
+        '''
+        if not country:
+            return False
+        entry = self.ensure(country)
+        return entry is not None and normalize(city) in entry.names
+
+    def response(self, country: str) -> PreparedResponse | None:
+        '''
+            The country's list as a ready-to-send JSON body, or None while it is loading.
+        '''
+        entry = self.ensure(country)
+        return entry.response if entry is not None else None
+
+    def put(self, country: str, cities: list[str], persist: bool = False):
+        key = self._key(country)
+        with self._lock:
+            self.countries.add(key)
+        entry = self._entry(key)
+        self._install(entry, cities, self._clock())
+        if persist:
+            self._write_snapshot(key, cities)
+
+    def status(self) -> dict:
+        with self._lock:
+            countries = dict(self._countries)
+        return {
+            key: {
+                "ready": entry.ready.is_set(),
+                "cities": len(entry.cities),
+                "age_seconds": int(self._clock() - entry.loaded_at) if entry.loaded_at else None,
+                "refreshing": entry.refreshing,
+                "error": entry.error,
+            }
+            for key, entry in countries.items()
+        }
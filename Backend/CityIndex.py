@@ -0,0 +1,112 @@
+from bisect import bisect_left
+from typing import Final
+import unicodedata
+import re
+
+DEFAULT_LIMIT: Final[int] = 7
+_SEPARATORS = re.compile(r"[\s\-']+")
+
+def normalize(text: str) -> str:
+    '''
+        Casefold and strip diacritics, so "Brașov", "brasov" and "BRAŞOV" share one key.
+    '''
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+def _bigrams(text: str) -> list[tuple[str, int]]:
+    return [(text[i:i + 2], i) for i in range(len(text) - 1)]
+
+def _prefix_distance(query: str, name: str, bound: int) -> int:
+    '''
+        Edit distance between query and the closest prefix of name (bounded, early exit).
+    '''
+    previous = list(range(len(name) + 1))
+    for i, qc in enumerate(query, 1):
+        current = [i] + [0] * len(name)
+        for j, nc in enumerate(name, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (qc != nc))
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+
+    return min(previous)
+
+class CityIndex:
+    '''
+        Immutable autocomplete index over one country's city names.
+
+        - Prefix lookups run on a sorted array of normalized keys with bisect. Every word of a
+          multi-word name ("Cluj-Napoca" -> "napoca") is a key as well.
+        - Typo tolerance uses a positional bigram index to pick candidates, verified with a bounded
+          prefix edit distance.
+    '''
+
+    def __init__(self, names: list[str]):
+        self.names: list[str] = list(dict.fromkeys(names))
+
+        keys: list[tuple[str, int, int]] = []
+        for idx, name in enumerate(self.names):
+            full = normalize(name)
+            keys.append((full, 0, idx))
+            for word in _SEPARATORS.split(full)[1:]:
+                if word:
+                    keys.append((word, 1, idx))
+
+        keys.sort()
+        self._keys: list[str] = [k for k, _, _ in keys]
+        self._entries: list[tuple[int, int]] = [(rank, idx) for _, rank, idx in keys]
+        self._normalized: list[str] = [normalize(name) for name in self.names]
+
+        self._grams: dict[tuple[str, int], list[int]] = {}
+        for idx, full in enumerate(self._normalized):
+            for gram, pos in _bigrams(full):
+                self._grams.setdefault((gram, pos), []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[str]:
+        query = normalize(query or "")
+        if not query or limit <= 0:
+            return []
+
+        scored: dict[int, tuple] = {}
+        start = bisect_left(self._keys, query)
+        for pos in range(start, len(self._keys)):
+            if not self._keys[pos].startswith(query):
+                break
+            rank, idx = self._entries[pos]
+            score = (0, rank, len(self._normalized[idx]), self._normalized[idx])
+            if idx not in scored or score < scored[idx]:
+                scored[idx] = score
+
+        if len(scored) < limit and len(query) >= 5:
+            for idx, dist in self._fuzzy(query):
+                scored.setdefault(idx, (1, dist, len(self._normalized[idx]), self._normalized[idx]))
+
+        best = sorted(scored.items(), key=lambda item: item[1])[:limit]
+        return [self.names[idx] for idx, _ in best]
+
+    def _fuzzy(self, query: str):
+        max_distance = 1 if len(query) <= 7 else 2
+        grams = _bigrams(query)
+        # q-gram lemma: every edit destroys at most two bigrams of the query and shifts the
+        # rest by at most max_distance positions.
+        needed = max(1, len(grams) - 2 * max_distance)
+
+        hits: dict[int, int] = {}
+        for gram, qpos in grams:
+            matched = set()
+            for pos in range(max(0, qpos - max_distance), qpos + max_distance + 1):
+                matched.update(self._grams.get((gram, pos), ()))
+            for idx in matched:
+                hits[idx] = hits.get(idx, 0) + 1
+
+        span = len(query) + max_distance
+        for idx, shared in hits.items():
+            if shared < needed:
+                continue
+            dist = _prefix_distance(query, self._normalized[idx][:span], max_distance)
+            if dist <= max_distance:
+                yield idx, dist
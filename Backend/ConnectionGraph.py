@@ -0,0 +1,146 @@
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from threading import RLock
+from typing import Final
+
+DEFAULT_MIN_TRANSFER: Final[int] = 15 * 60
+DEFAULT_MAX_LEGS: Final[int] = 3
+DEFAULT_HORIZON: Final[int] = 48 * 3600
+
+@dataclass(frozen=True)
+class Leg:
+    ride_id: int
+    source: str
+    destination: str
+    departure: int
+    arrival: int
+    seats: int
+
+    def to_dict(self):
+        return {
+            "ride_id": self.ride_id,
+            "source": self.source,
+            "destination": self.destination,
+            "departure_date": self.departure,
+            "arrival_estimate": self.arrival,
+            "available_seats": self.seats,
+        }
+
+class ConnectionGraph:
+    '''
+        Time-expanded graph of upcoming rides: every city keeps its departures sorted by time,
+        and each departure is an edge to (destination, arrival). Rides are added, removed and
+        re-seated one at a time as they change, so queries never rebuild anything.
+
+        `earliest_arrival` runs RAPTOR-style rounds: round k relaxes journeys with k legs,
+        starting only from cities whose arrival improved in round k - 1.
+    '''
+
+    def __init__(self):
+        self._lock = RLock()
+        self._legs: dict[int, Leg] = {}
+        self._departures: dict[str, list[tuple[int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._legs)
+
+    def add(self, leg: Leg):
+        with self._lock:
+            self.remove(leg.ride_id)
+            self._legs[leg.ride_id] = leg
+            insort(self._departures.setdefault(leg.source, []), (leg.departure, leg.ride_id))
+
+    def remove(self, ride_id: int):
+        with self._lock:
+            leg = self._legs.pop(ride_id, None)
+            if leg is None:
+                return
+
+            departures = self._departures[leg.source]
+            pos = bisect_left(departures, (leg.departure, leg.ride_id))
+            if pos < len(departures) and departures[pos] == (leg.departure, leg.ride_id):
+                departures.pop(pos)
+
+    def set_seats(self, ride_id: int, seats: int):
+        with self._lock:
+            leg = self._legs.get(ride_id)
+            if leg is not None:
+                self._legs[ride_id] = Leg(leg.ride_id, leg.source, leg.destination, leg.departure, leg.arrival, seats)
+
+    def prune(self, before: int) -> int:
+        '''
+            Drop every ride departing before `before`. Returns how many were removed.
+        '''
+        with self._lock:
+            removed = 0
+            for departures in self._departures.values():
+                cut = bisect_left(departures, (before, -1))
+                for _departure, ride_id in departures[:cut]:
+                    self._legs.pop(ride_id, None)
+                del departures[:cut]
+                removed += cut
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self._legs.clear()
+            self._departures.clear()
+
+    def earliest_arrival(self, origin: str, target: str, depart_after: int,
+                         min_transfer: int = DEFAULT_MIN_TRANSFER, max_legs: int = DEFAULT_MAX_LEGS,
+                         seats: int = 1, horizon: int = DEFAULT_HORIZON) -> list[Leg] | None:
+        '''
+            Legs of the journey reaching target earliest, or None if there is none within
+            max_legs rides and `horizon` seconds after depart_after.
+        '''
+        deadline = depart_after + horizon
+        unreachable = deadline + 1
+
+        with self._lock:
+            # rounds[k][city] = (arrival, last leg) using at most k rides; best[] prunes across rounds.
+            rounds: list[dict[str, tuple[int, Leg | None]]] = [{origin: (depart_after, None)}]
+            best: dict[str, int] = {origin: depart_after}
+            marked = {origin}
+
+            for _round in range(max_legs):
+                previous = rounds[-1]
+                current = dict(previous)
+                improved = set()
+
+                for city in marked:
+                    arrival, _leg = previous[city]
+                    ready = arrival if city == origin else arrival + min_transfer
+                    departures = self._departures.get(city, [])
+                    for pos in range(bisect_left(departures, (ready, -1)), len(departures)):
+                        departure, ride_id = departures[pos]
+                        # Nothing leaving after the best known arrival can improve the target.
+                        if departure > deadline or departure >= best.get(target, unreachable):
+                            break
+
+                        leg = self._legs[ride_id]
+                        if leg.seats < seats or leg.destination == origin:
+                            continue
+                        if leg.arrival < best.get(leg.destination, unreachable):
+                            best[leg.destination] = leg.arrival
+                            current[leg.destination] = (leg.arrival, leg)
+                            improved.add(leg.destination)
+
+                rounds.append(current)
+                marked = improved - {target}
+                if not marked:
+                    break
+
+        if target not in rounds[-1]:
+            return None
+
+        journey = []
+        k = len(rounds) - 1
+        _arrival, leg = rounds[k][target]
+        while leg is not None:
+            journey.append(leg)
+            k -= 1
+            _arrival, leg = rounds[k][leg.source]
+
+        return journey[::-1]
+
+CONNECTIONS: Final[ConnectionGraph] = ConnectionGraph()
@@ -0,0 +1,79 @@
+from pathlib import Path
+import json
+import numpy as np
+
+from GeoIndex import EARTH_RADIUS_KM
+
+def _as_radians(points) -> np.ndarray:
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return np.radians(points)
+
+def one_to_many(origin: tuple[float, float], points) -> np.ndarray:
+    '''
+        Great-circle distances (km) from origin to every (lat, lon) row of points.
+    '''
+    return many_to_many([origin], points)[0]
+
+def many_to_many(sources, targets) -> np.ndarray:
+    '''
+        len(sources) x len(targets) matrix of great-circle distances (km), computed in one
+        broadcasted haversine pass instead of a Python loop per pair.
+    '''
+    a = _as_radians(sources)
+    b = _as_radians(targets)
+    lat1, lon1 = a[:, 0:1], a[:, 1:2]
+    lat2, lon2 = b[:, 0], b[:, 1]
+
+    h = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+class CityDistanceMatrix:
+    '''
+        Precomputed all-pairs distances for a fixed list of cities.
+
+        Stored as a float32 .npy next to a .json list of names and opened with mmap, so every
+        worker process shares the same page-cache copy and a pair lookup is one array index.
+    '''
+
+    def __init__(self, names: list[str], matrix: np.ndarray):
+        self.names = names
+        self.matrix = matrix
+        self._index: dict[str, int] = {name: i for i, name in enumerate(names)}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get(self, city1: str, city2: str) -> float | None:
+        i = self._index.get(city1)
+        j = self._index.get(city2)
+        if i is None or j is None:
+            return None
+        return float(self.matrix[i, j])
+
+    @staticmethod
+    def build(locations: dict[str, tuple[float, float]]) -> 'CityDistanceMatrix':
+        names = list(locations)
+        points = [locations[name] for name in names]
+        return CityDistanceMatrix(names, many_to_many(points, points).astype(np.float32))
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(path.with_suffix('.npy'), self.matrix)
+        path.with_suffix('.json').write_text(json.dumps(self.names, ensure_ascii=False))
+
+    @staticmethod
+    def load(path: Path) -> 'CityDistanceMatrix | None':
+        path = Path(path)
+        if not path.with_suffix('.npy').exists() or not path.with_suffix('.json').exists():
+            return None
+
+        names = json.loads(path.with_suffix('.json').read_text())
+        matrix = np.load(path.with_suffix('.npy'), mmap_mode='r')
+        return CityDistanceMatrix(names, matrix)
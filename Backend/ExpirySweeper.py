@@ -0,0 +1,77 @@
+from threading import Event, Thread
+from typing import Final
+import time
+
+from database import db
+from models.Booking import Booking
+from models.RideOffer import RideOffer
+from models.enums import BookingStatus
+from SearchCache import RIDE_SEARCH_CACHE, route_key
+from ConnectionGraph import CONNECTIONS
+
+INTERVAL_SECONDS: Final[int] = 60
+CHUNK_SIZE: Final[int] = 500
+# A ride stops being bookable one hour before it leaves (see RideOffer.active).
+BOOKING_CUTOFF_SECONDS: Final[int] = 3600
+STOP: Event = Event()
+
+def sweep(now: int | None = None, chunk_size: int = CHUNK_SIZE) -> tuple[int, int]:
+    '''
+        Deactivate rides that are past the booking cutoff and expire their pending bookings.
+
+        Works in chunks of at most chunk_size rides, each one a short transaction of set-based
+        UPDATEs keyed by primary key, so no lock is ever held for long.
+        Must run inside an app context. Returns (rides deactivated, bookings expired).
+    '''
+    now = int(time.time()) if now is None else now
+    cutoff = now + BOOKING_CUTOFF_SECONDS
+    rides_done = bookings_done = 0
+
+    while True:
+        chunk = (
+            db.session.query(RideOffer.id, RideOffer.source, RideOffer.destination, RideOffer.departure_date)
+            .filter(RideOffer.active == db.true(), RideOffer.departure_date <= cutoff)
+            .order_by(RideOffer.departure_date)
+            .limit(chunk_size)
+            .all()
+        )
+        if not chunk:
+            break
+
+        ids = [ride_id for ride_id, *_ in chunk]
+        rides_done += db.session.execute(
+            db.update(RideOffer)
+            .where(RideOffer.id.in_(ids), RideOffer.active == db.true())
+            .values(active=False)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        bookings_done += db.session.execute(
+            db.update(Booking)
+            .where(Booking.ride_id.in_(ids), Booking.status == BookingStatus.PENDING)
+            .values(status=BookingStatus.EXPIRED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        for ride_id, source, destination, departure_date in chunk:
+            RIDE_SEARCH_CACHE.invalidate(route_key(source, destination, departure_date))
+            CONNECTIONS.remove(ride_id)
+
+        if len(chunk) < chunk_size:
+            break
+
+    return rides_done, bookings_done
+
+def _run(app, interval: int):
+    while not STOP.wait(interval):
+        try:
+            with app.app_context():
+                rides, bookings = sweep()
+                if app.debug and (rides or bookings):
+                    print(f'sweep: deactivated {rides} rides, expired {bookings} bookings.')
+        except Exception as e:
+            print(f'sweep: {e}.')
+
+def start(app, interval: int = INTERVAL_SECONDS):
+    STOP.clear()
+    Thread(target = _run, args = (app, interval), daemon = True).start()
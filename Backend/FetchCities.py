@@ -1,41 +1,80 @@
-from threading import Event, Thread
+from concurrent.futures import TimeoutError as FutureTimeout
+from queue import Full
+from threading import Thread
 from pathlib import Path
 from typing import Final
+from CityIndex import normalize
+from CityCatalogue import CityCatalogue
+from GeoIndex import GeoGrid, haversine
+from DistanceMatrix import CityDistanceMatrix
+from Gazetteer import Gazetteer
+from GeocodeCache import GeocodeCache
+from GeocodePool import GeocodePool
+from HttpClient import HttpClient
 import requests
-import math
 
 URL: Final[str] = 'https://countriesnow.space/api/v0.1/countries/cities'
 GEO_URL: Final[str] = 'https://nominatim.openstreetmap.org/search'
-LOCATION_CACHE: dict[str, tuple[float, float]] = dict()
 BASE_PATH: Final[Path] = Path('static')
-CITY_CACHE: dict[str, list] = dict()
-EVENT: Event = Event()
+DATA_PATH: Final[Path] = Path('data')
+PLACE_INDEX: GeoGrid = GeoGrid()
+DISTANCE_CACHE: dict[str, CityDistanceMatrix] = dict()
+GAZETTEER: Gazetteer | None = None
+GEOCODE_CACHE_PATH: Final[Path] = DATA_PATH / 'geocode.sqlite3'
+# Set by use_geocode_cache at startup; until then nothing is read from or written to disk.
+GEOCODE_CACHE: GeocodeCache | None = None
+NOMINATIM_FALLBACK: bool = True
+FETCH_TIMEOUT_SECONDS: Final[int] = 10
+HTTP_CLIENT: HttpClient = HttpClient(timeout = (3.05, FETCH_TIMEOUT_SECONDS), headers = {'User-Agent': 'TripLink-Agent'})
 
 HEADERS: Final[dict] = {
     "Content-Type": "application/json"
 }
 
-def _fetch_all(country):
-    global URL, HEADERS, EVENT
+def _fetch_all(country) -> list[str]:
+    global URL, HEADERS, HTTP_CLIENT
     payload = {
         "country": country,
     }
 
-    response = requests.post(URL, json = payload, headers = HEADERS)
-    CITY_CACHE[country] = response.json()['data']
-    EVENT.set()
+    response = HTTP_CLIENT.post(URL, json = payload, headers = HEADERS)
+    response.raise_for_status()
+    return response.json()['data']
+
+CATALOGUE: CityCatalogue = CityCatalogue(_fetch_all, DATA_PATH / 'cities')
+
+def load(country, cities: list):
+    '''
+        Store a country's city list and build its autocomplete index once.
+    '''
+    global CATALOGUE
+    CATALOGUE.put(country, cities)
 
-def get_all(country) -> list:
-    # TODO(fix): Should be used with only one country for now.
-    global CITY_CACHE, EVENT
-    EVENT.wait()
-    return CITY_CACHE[country]
+def get_all(country, timeout: float = 0) -> list | None:
+    '''
+        City list of a country, or None if it is not loaded within timeout seconds.
+        Request handlers keep the default and never wait on the network.
+    '''
+    global CATALOGUE
+    return CATALOGUE.get(country, timeout)
+
+def autocomplete(country, query, limit) -> list[str]:
+    '''
+        Top matches for the typed prefix. Empty while the country is still loading.
+    '''
+    global CATALOGUE
+    index = CATALOGUE.index(country)
+    return index.search(query, limit) if index is not None else []
 
 def prefetch(country):
-    Thread(target = _fetch_all, args=(country,)).start()
+    '''
+        Load the country's snapshot now and refresh it from upstream in the background.
+    '''
+    global CATALOGUE
+    CATALOGUE.ensure(country, force = True)
 
 def _fetch_location(city, country):
-    global GEO_URL
+    global GEO_URL, HTTP_CLIENT, GEOCODE_POOL
     params = {
         'city': city,
         'country': country,
@@ -43,11 +82,8 @@ def _fetch_location(city, country):
         'limit': 1
     }
 
-    headers = {
-        'User-Agent': 'TripLink-Agent'
-    }
-
-    response = requests.get(GEO_URL, params = params, headers = headers)
+    # The pool paid for the first attempt; retries wait for their own tokens.
+    response = HTTP_CLIENT.get(GEO_URL, params = params, limiter = GEOCODE_POOL.limiter)
     response.raise_for_status()
     data = response.json()
 
@@ -57,18 +93,15 @@ def _fetch_location(city, country):
     return float(data[0]['lat']), float(data[0]['lon'])
 
 def _fetch_location_with_no_country(city):
-    global GEO_URL
+    global GEO_URL, HTTP_CLIENT, GEOCODE_POOL
     params = {
         'city': city,
         'format': 'json',
         'limit': 1
     }
 
-    headers = {
-        'User-Agent': 'TripLink-Agent'
-    }
-
-    response = requests.get(GEO_URL, params = params, headers = headers)
+    # The pool paid for the first attempt; retries wait for their own tokens.
+    response = HTTP_CLIENT.get(GEO_URL, params = params, limiter = GEOCODE_POOL.limiter)
     response.raise_for_status()
     data = response.json()
 
@@ -78,32 +111,235 @@ def _fetch_location_with_no_country(city):
     return float(data[0]['lat']), float(data[0]['lon'])
 
 CENTROID: Final[tuple[float, float]] = (45.943161, 24.96676)
+AVERAGE_SPEED_KMH: Final[float] = 60
+DEFAULT_TRAVEL_SECONDS: Final[int] = 3 * 3600
+
+def use_http_client(client: HttpClient):
+    '''
+        Route every outbound call through client, e.g. one whose origins point at a local mirror.
+    '''
+    global HTTP_CLIENT
+    HTTP_CLIENT.close()
+    HTTP_CLIENT = client
+
+def use_geocode_cache(path = GEOCODE_CACHE_PATH):
+    global GEOCODE_CACHE
+    GEOCODE_CACHE = GeocodeCache(path)
 
-def get_location(city, country) -> tuple[float, float]:
-    global LOCATION_CACHE, CENTROID
-    if city in LOCATION_CACHE:
-        return LOCATION_CACHE[city]
+def use_geocoder(gazetteer: Gazetteer | None, fallback: bool = True):
+    '''
+        Answer lookups from a local gazetteer; Nominatim is only asked when fallback is on and
+        the gazetteer has no match. Tests pass a stub gazetteer with fallback off.
+    '''
+    global GAZETTEER, NOMINATIM_FALLBACK
+    GAZETTEER = gazetteer
+    NOMINATIM_FALLBACK = fallback
+
+def load_gazetteer(path, fallback: bool = True) -> int:
+    gazetteer = Gazetteer.load(path)
+    use_geocoder(gazetteer, fallback)
+    return len(gazetteer)
+
+def _resolve(city, country) -> tuple[float, float] | None:
+    '''
+        Ask Nominatim for one city and remember the answer. Runs on GEOCODE_POOL workers only.
+        Unknown cities are cached as such; network errors are not.
+    '''
+    global GEOCODE_CACHE
+    # Another worker process may have resolved it while this call was queued.
+    found, location = GEOCODE_CACHE.get(city, country) if GEOCODE_CACHE is not None else (False, None)
+    if found:
+        return location
 
     try:
-        data = _fetch_location(city, country) if country is not None else _fetch_location_with_no_country(city)
-        LOCATION_CACHE[city] = data
-        return data
-    except:
-        return CENTROID
+        location = _fetch_location(city, country) if country is not None else _fetch_location_with_no_country(city)
+    except requests.RequestException:
+        return None
+    except ValueError:
+        location = None
+
+    if GEOCODE_CACHE is not None:
+        GEOCODE_CACHE.put(city, country, location)
+    return location
+
+GEOCODE_POOL: GeocodePool = GeocodePool(_resolve)
+
+def _pool_key(city, country):
+    return normalize(country or ''), normalize(city)
+
+def _cached(city, country) -> tuple[bool, tuple[float, float] | None]:
+    global GAZETTEER, GEOCODE_CACHE
+    if GAZETTEER is not None:
+        location = GAZETTEER.lookup(city, country)
+        if location is not None:
+            return True, location
+
+    return GEOCODE_CACHE.get(city, country) if GEOCODE_CACHE is not None else (False, None)
+
+def _resolvable(city, country) -> bool:
+    '''
+        Only names on the country's city list are sent upstream, so typed or chat input that
+        is not a city never takes a slot in the pool.
+    '''
+    global CATALOGUE, NOMINATIM_FALLBACK
+    return NOMINATIM_FALLBACK and CATALOGUE.contains(country, city)
+
+def cached_location(city, country, resolve: bool = True) -> tuple[float, float] | None:
+    '''
+        Coordinates from the gazetteer or the geocode cache only; never waits on the network.
+        On a miss the city is queued for a background resolve (unless resolve is off), so a later
+        call can answer it. None means "not known right now".
+    '''
+    global GEOCODE_POOL
+    found, location = _cached(city, country)
+    if not found and resolve and _resolvable(city, country):
+        GEOCODE_POOL.submit(_pool_key(city, country), city, country)
+    return location
+
+def get_location(city, country, timeout: float | None = 3 * FETCH_TIMEOUT_SECONDS) -> tuple[float, float]:
+    '''
+        Coordinates of a city: local gazetteer first, then the shared on-disk cache, then
+        Nominatim (if enabled) through the rate-limited pool. Blocks on a miss for at most
+        timeout seconds, so request handlers should use cached_location instead.
+    '''
+    global GEOCODE_POOL, CENTROID
+    found, location = _cached(city, country)
+    if not found and _resolvable(city, country):
+        try:
+            location = GEOCODE_POOL.submit(_pool_key(city, country), city, country).result(timeout)
+        except (FutureTimeout, Full):
+            location = None
+    return location if location is not None else CENTROID
+
+def get_locations(cities, country, timeout: float | None = None) -> dict[str, tuple[float, float]]:
+    '''
+        Batch geocoding: cached cities are answered at once, the rest are resolved concurrently
+        by the pool. Cities that are unknown or not resolved within timeout are left out.
+    '''
+    global GEOCODE_POOL
+    locations, missing = {}, {}
+    for city in dict.fromkeys(cities):
+        found, location = _cached(city, country)
+        if location is not None:
+            locations[city] = location
+        elif not found and _resolvable(city, country):
+            missing[city] = _pool_key(city, country)
+
+    resolved = GEOCODE_POOL.map({key: (city, country) for city, key in missing.items()}, timeout)
+    for city, key in missing.items():
+        if resolved.get(key) is not None:
+            locations[city] = resolved[key]
+
+    return locations
+
+def index_place(city, country):
+    '''
+        Make a ride endpoint discoverable by radius searches. Unresolvable cities are skipped.
+    '''
+    global PLACE_INDEX, CENTROID
+    location = get_location(city, country)
+    if location != CENTROID:
+        PLACE_INDEX.add(city, *location)
+
+def _index_places(cities, country):
+    global PLACE_INDEX
+    for city, location in get_locations(cities, country).items():
+        PLACE_INDEX.add(city, *location)
+
+def index_places(cities, country) -> Thread:
+    '''
+        Index cities in the background; the returned thread can be joined.
+    '''
+    thread = Thread(target = _index_places, args = (list(cities), country), daemon = True)
+    thread.start()
+    return thread
+
+def nearby(city, country, radius_km) -> dict[str, float]:
+    '''
+        Indexed ride endpoints within radius_km of city, mapped to their distance from it.
+        The city itself is always part of the result; so is nothing else while the city is
+        still being geocoded in the background.
+    '''
+    global PLACE_INDEX
+    places = {city: 0.0}
+    location = cached_location(city, country)
+    if location is not None:
+        places.update(PLACE_INDEX.within(*location, radius_km))
+        places[city] = 0.0
+
+    return places
+
+def travel_seconds(source, destination) -> int:
+    '''
+        Rough driving time between two indexed cities; never geocodes.
+        Falls back to DEFAULT_TRAVEL_SECONDS when either city is not indexed yet.
+    '''
+    global PLACE_INDEX
+    start, end = PLACE_INDEX.location(source), PLACE_INDEX.location(destination)
+    if start is None or end is None:
+        return DEFAULT_TRAVEL_SECONDS
+
+    return int(distance(start, end) / AVERAGE_SPEED_KMH * 3600)
+
+def _distance_matrix_path(country) -> Path:
+    return DATA_PATH / 'distances' / country.lower()
+
+def load_distance_matrix(country) -> bool:
+    '''
+        Map the precomputed all-pairs matrix of a country, if one was built.
+    '''
+    global DISTANCE_CACHE
+    matrix = CityDistanceMatrix.load(_distance_matrix_path(country))
+    if matrix is not None:
+        DISTANCE_CACHE[country.lower()] = matrix
+    return matrix is not None
+
+def build_distance_matrix(country) -> int:
+    '''
+        Geocode every city of a country and store their all-pairs distance matrix on disk.
+        Offline job: it resolves each uncached city once. Returns the number of cities kept.
+    '''
+    global DISTANCE_CACHE, FETCH_TIMEOUT_SECONDS
+    cities = get_all(country, timeout = 3 * FETCH_TIMEOUT_SECONDS)
+    if cities is None:
+        raise RuntimeError(f'No city list available for {country}.')
+
+    locations = get_locations(cities, country)
+    matrix = CityDistanceMatrix.build(locations)
+    matrix.save(_distance_matrix_path(country))
+    DISTANCE_CACHE[country.lower()] = matrix
+    return len(matrix)
+
+def city_distance(city1, city2, country) -> float:
+    '''
+        Distance in km between two named cities: an array lookup when both are in the country's
+        precomputed matrix, a geocode + haversine otherwise.
+    '''
+    global DISTANCE_CACHE
+    matrix = DISTANCE_CACHE.get(country.lower()) if country is not None else None
+    if matrix is not None:
+        known = matrix.get(city1, city2)
+        if known is not None:
+            return known
+
+    return distance(get_location(city1, country), get_location(city2, country))
+
+def cached_distance(city1, city2, country) -> float | None:
+    '''
+        Like city_distance, but safe inside a request: it only uses the matrix and already
+        known coordinates. None while either city is still being resolved in the background.
+    '''
+    global DISTANCE_CACHE
+    matrix = DISTANCE_CACHE.get(country.lower()) if country is not None else None
+    if matrix is not None:
+        known = matrix.get(city1, city2)
+        if known is not None:
+            return known
+
+    start, end = cached_location(city1, country), cached_location(city2, country)
+    if start is None or end is None:
+        return None
+    return distance(start, end)
 
 def distance(city1: tuple[float, float], city2: tuple[float, float]):
-    lat1, lon1 = city1
-    lat2, lon2 = city2
-    R: Final[float] = 6371
-    d_lat = math.radians(lat2 - lat1)
-    d_lon = math.radians(lon2 - lon1)
-
-    a = (
-        math.sin(d_lat / 2) ** 2
-        + math.cos(math.radians(lat1))
-        * math.cos(math.radians(lat2))
-        * math.sin(d_lon / 2) ** 2
-    )
-
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+    return haversine(*city1, *city2)
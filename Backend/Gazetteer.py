@@ -0,0 +1,90 @@
+from array import array
+from pathlib import Path
+from typing import Final
+import csv
+import sys
+
+from CityIndex import normalize
+
+# Country names used by the app -> ISO 3166 alpha-2 codes used by GeoNames.
+COUNTRY_CODES: Final[dict[str, str]] = {
+    "romania": "RO",
+    "moldova": "MD",
+    "hungary": "HU",
+    "bulgaria": "BG",
+}
+
+# GeoNames "geoname" table columns (tab separated, no header).
+_NAME, _ASCII_NAME, _ALTERNATE_NAMES, _LATITUDE, _LONGITUDE, _FEATURE_CLASS = 1, 2, 3, 4, 5, 6
+_COUNTRY_CODE, _POPULATION = 8, 14
+
+def country_code(country: str | None) -> str | None:
+    if not country:
+        return None
+    if len(country) == 2:
+        return country.upper()
+    return COUNTRY_CODES.get(country.lower())
+
+class Gazetteer:
+    '''
+        Offline geocoder over a GeoNames-style dump.
+
+        Coordinates live in two flat float arrays; a dict maps (country code, normalized name)
+        to a row, so a lookup is one hash probe with no network. When several places share a
+        name the most populous one wins, like a search engine would rank them.
+    '''
+
+    def __init__(self):
+        self._lat = array('d')
+        self._lon = array('d')
+        self._population: list[int] = []
+        self._by_country: dict[tuple[str, str], int] = {}
+        self._by_name: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._lat)
+
+    def add(self, names, country: str, lat: float, lon: float, population: int = 0):
+        row = len(self._lat)
+        self._lat.append(lat)
+        self._lon.append(lon)
+        self._population.append(population)
+
+        for name in {normalize(name) for name in names if name}:
+            for index, key in ((self._by_country, (country, name)), (self._by_name, name)):
+                current = index.get(key)
+                if current is None or self._population[current] < population:
+                    index[key] = row
+
+    def lookup(self, city: str, country: str | None = None) -> tuple[float, float] | None:
+        name = normalize(city)
+        code = country_code(country)
+        row = self._by_country.get((code, name)) if code else self._by_name.get(name)
+        if row is None:
+            return None
+        return self._lat[row], self._lon[row]
+
+    @staticmethod
+    def from_locations(locations: dict[str, tuple[float, float]], country: str) -> 'Gazetteer':
+        gazetteer = Gazetteer()
+        for name, (lat, lon) in locations.items():
+            gazetteer.add([name], country_code(country), lat, lon)
+        return gazetteer
+
+    @staticmethod
+    def load(path: Path, feature_classes: str = "P") -> 'Gazetteer':
+        '''
+            Read a GeoNames dump (e.g. RO.txt or cities500.txt), keeping populated places only.
+        '''
+        csv.field_size_limit(sys.maxsize)
+        gazetteer = Gazetteer()
+        with open(path, encoding="utf-8", newline="") as handle:
+            for row in csv.reader(handle, delimiter="\t", quoting=csv.QUOTE_NONE):
+                if len(row) <= _POPULATION or row[_FEATURE_CLASS] not in feature_classes:
+                    continue
+
+                names = [row[_NAME], row[_ASCII_NAME], *row[_ALTERNATE_NAMES].split(",")]
+                gazetteer.add(names, row[_COUNTRY_CODE], float(row[_LATITUDE]), float(row[_LONGITUDE]),
+                              int(row[_POPULATION] or 0))
+
+        return gazetteer
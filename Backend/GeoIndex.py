@@ -0,0 +1,72 @@
+from threading import Lock
+from typing import Final
+import math
+
+EARTH_RADIUS_KM: Final[float] = 6371
+KM_PER_DEGREE: Final[float] = 111.32
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2
+    )
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+class GeoGrid:
+    '''
+        Uniform lat/lon grid over named places.
+
+        A radius query only visits the cells overlapping the query's bounding box and checks the
+        exact great-circle distance for the places stored there, so its cost depends on how many
+        places are nearby rather than on how many are indexed.
+    '''
+
+    def __init__(self, cell_degrees: float = 0.25):
+        self.cell_degrees = cell_degrees
+        self._lock = Lock()
+        self._cells: dict[tuple[int, int], set[str]] = {}
+        self._points: dict[str, tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._points
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def add(self, name: str, lat: float, lon: float):
+        with self._lock:
+            previous = self._points.get(name)
+            if previous is not None:
+                self._cells[self._cell(*previous)].discard(name)
+
+            self._points[name] = (lat, lon)
+            self._cells.setdefault(self._cell(lat, lon), set()).add(name)
+
+    def location(self, name: str) -> tuple[float, float] | None:
+        return self._points.get(name)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> list[tuple[str, float]]:
+        '''
+            Places at most radius_km away from (lat, lon), closest first, as (name, distance_km).
+        '''
+        d_lat = radius_km / KM_PER_DEGREE
+        d_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        low_i, low_j = self._cell(lat - d_lat, lon - d_lon)
+        high_i, high_j = self._cell(lat + d_lat, lon + d_lon)
+
+        found = []
+        with self._lock:
+            for i in range(low_i, high_i + 1):
+                for j in range(low_j, high_j + 1):
+                    for name in self._cells.get((i, j), ()):
+                        dist = haversine(lat, lon, *self._points[name])
+                        if dist <= radius_km:
+                            found.append((name, dist))
+
+        found.sort(key=lambda item: item[1])
+        return found
@@ -0,0 +1,144 @@
+from pathlib import Path
+from threading import Lock, local
+from typing import Final
+import sqlite3
+import time
+
+from CityIndex import normalize
+
+TTL_SECONDS: Final[int] = 30 * 24 * 3600
+NEGATIVE_TTL_SECONDS: Final[int] = 24 * 3600
+MAX_ENTRIES: Final[int] = 50_000
+# Recency is refreshed at most this often per entry, so hot reads do not turn into writes.
+TOUCH_INTERVAL: Final[int] = 300
+EVICT_EVERY: Final[int] = 64
+
+class GeocodeCache:
+    '''
+        Geocoding results shared by every worker process through one SQLite file (WAL mode).
+
+        Keys are (country, normalized city), so equal names in different countries never
+        collide. Entries expire after `ttl`; unresolvable names are stored as negative entries
+        with the shorter `negative_ttl`. Size is bounded by evicting the least recently used rows.
+    '''
+
+    def __init__(self, path: Path, ttl: int = TTL_SECONDS, negative_ttl: int = NEGATIVE_TTL_SECONDS,
+                 max_entries: int = MAX_ENTRIES, clock = time.time):
+        self.path = Path(path)
+        self._clock = clock
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._local = local()
+        self._lock = Lock()
+        self._puts = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS geocode ('
+                ' country TEXT NOT NULL, city TEXT NOT NULL, lat REAL, lon REAL,'
+                ' expires_at REAL NOT NULL, last_used REAL NOT NULL,'
+                ' PRIMARY KEY (country, city))'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_geocode_last_used ON geocode (last_used)')
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _key(city: str, country: str | None) -> tuple[str, str]:
+        return normalize(country or ''), normalize(city)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, city: str, country: str | None) -> tuple[bool, tuple[float, float] | None]:
+        '''
+            (found, location). found=True with location=None is a cached "does not exist".
+        '''
+        key = self._key(city, country)
+        now = self._clock()
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT lat, lon, expires_at, last_used FROM geocode WHERE country = ? AND city = ?', key
+        ).fetchone()
+
+        if row is None or row[2] <= now:
+            if row is not None:
+                connection.execute('DELETE FROM geocode WHERE country = ? AND city = ?', key)
+            self._count('misses')
+            return False, None
+
+        lat, lon, _expires_at, last_used = row
+        if now - last_used > TOUCH_INTERVAL:
+            connection.execute('UPDATE geocode SET last_used = ? WHERE country = ? AND city = ?', (now, *key))
+
+        if lat is None:
+            self._count('negative_hits')
+            return True, None
+
+        self._count('hits')
+        return True, (lat, lon)
+
+    def put(self, city: str, country: str | None, location: tuple[float, float] | None):
+        now = self._clock()
+        lat, lon = location if location is not None else (None, None)
+        expires_at = now + (self.ttl if location is not None else self.negative_ttl)
+
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO geocode (country, city, lat, lon, expires_at, last_used)'
+            ' VALUES (?, ?, ?, ?, ?, ?)',
+            (*self._key(city, country), lat, lon, expires_at, now)
+        )
+
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        '''
+            Drop expired rows, then the least recently used ones above max_entries.
+        '''
+        connection = self._connection()
+        removed = connection.execute('DELETE FROM geocode WHERE expires_at <= ?', (self._clock(),)).rowcount
+        excess = self.size() - self.max_entries
+        if excess > 0:
+            removed += connection.execute(
+                'DELETE FROM geocode WHERE rowid IN (SELECT rowid FROM geocode ORDER BY last_used LIMIT ?)',
+                (excess,)
+            ).rowcount
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def size(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM geocode').fetchone()[0]
+
+    def clear(self):
+        self._connection().execute('DELETE FROM geocode')
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            counters = {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0,
+                "evictions": self.evictions,
+            }
+        return {"size": self.size(), "max_entries": self.max_entries, **counters}
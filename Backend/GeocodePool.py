@@ -0,0 +1,137 @@
+from concurrent.futures import Future, wait
+from queue import Full, Queue
+from threading import Lock, Thread
+from typing import Callable, Final
+import time
+
+# Nominatim's usage policy allows at most one request per second.
+RATE_PER_SECOND: Final[float] = 1.0
+WORKERS: Final[int] = 2
+# At one request per second this is already a few minutes of work; later keys are refused.
+MAX_PENDING: Final[int] = 256
+
+class RateLimiter:
+    '''
+        Token bucket shared by every worker: `rate` requests per second, bursts of up to `burst`.
+    '''
+
+    def __init__(self, rate: float, burst: int = 1, clock = time.monotonic, sleep = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            self._sleep(wait_for)
+
+class GeocodePool:
+    '''
+        Background workers for slow lookups.
+
+        Calls are coalesced by key (singleflight): while a key is queued or running, every
+        caller asking for it gets the same Future, so a burst of searches for one uncached city
+        costs a single upstream request. Workers share one RateLimiter, so the provider's budget
+        holds no matter how many keys are pending. At most `max_pending` keys are queued or
+        running; a new key beyond that gets a Future that already failed with queue.Full.
+    '''
+
+    def __init__(self, fetch: Callable, rate: float = RATE_PER_SECOND, workers: int = WORKERS,
+                 limiter: RateLimiter | None = None, max_pending: int = MAX_PENDING):
+        self._fetch = fetch
+        self._limiter = limiter if limiter is not None else RateLimiter(rate)
+        self._workers = workers
+        self.max_pending = max_pending
+        self._queue: Queue = Queue(maxsize=max_pending)
+        self._lock = Lock()
+        self._inflight: dict[object, Future] = {}
+        self._started = False
+        self.submitted = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
+
+    def _start(self):
+        for _ in range(self._workers):
+            Thread(target = self._run, daemon = True).start()
+        self._started = True
+
+    def _run(self):
+        while True:
+            key, args, future = self._queue.get()
+            try:
+                if future.set_running_or_notify_cancel():
+                    self._limiter.acquire()
+                    future.set_result(self._fetch(*args))
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+
+    def submit(self, key, *args) -> Future:
+        '''
+            Future of fetch(*args), shared with any pending call for the same key.
+        '''
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+            future = Future()
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                future.set_exception(Full(f'{self.max_pending} lookups already pending'))
+                return future
+
+            if not self._started:
+                self._start()
+            self._inflight[key] = future
+            self.submitted += 1
+            # Cannot block: every queued key is also in _inflight, which is capped above.
+            self._queue.put_nowait((key, args, future))
+
+        return future
+
+    def map(self, calls: dict, timeout: float | None = None) -> dict:
+        '''
+            Run {key: args} concurrently and return {key: result} for the calls that finished
+            in time without raising.
+        '''
+        futures = {key: self.submit(key, *args) for key, args in calls.items()}
+        wait(futures.values(), timeout = timeout)
+        return {
+            key: future.result()
+            for key, future in futures.items()
+            if future.done() and not future.cancelled() and future.exception() is None
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "in_flight": len(self._inflight),
+                "queued": self._queue.qsize(),
+            }
@@ -0,0 +1,151 @@
+from collections import deque
+from threading import BoundedSemaphore, Lock
+from typing import Final
+from urllib.parse import urlsplit
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) seconds.
+DEFAULT_TIMEOUT: Final[tuple[float, float]] = (3.05, 10)
+DEFAULT_RETRIES: Final[int] = 2
+BACKOFF_SECONDS: Final[float] = 0.5
+MAX_BACKOFF_SECONDS: Final[float] = 8
+MAX_PER_HOST: Final[int] = 4
+RETRY_STATUSES: Final[frozenset[int]] = frozenset({429, 502, 503, 504})
+LATENCY_SAMPLES: Final[int] = 256
+
+class _HostMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.latencies)
+        percentile = lambda p: round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2) if samples else None
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+        }
+
+class HttpClient:
+    '''
+        Shared outbound HTTP client: one requests.Session, so connections are kept alive and
+        pooled per host, with at most `max_per_host` calls in flight to any one host.
+
+        Every call has a timeout. Connection errors, timeouts and 429/5xx answers are retried
+        with exponential backoff and full jitter (honouring Retry-After). A Retry-After longer
+        than MAX_BACKOFF_SECONDS is not waited out: the answer is returned as is. Callers
+        bound by a provider's rate pass their `limiter`, so retries spend its tokens too.
+        Latency is sampled per host for stats().
+
+        `origins` maps an origin ("https://nominatim.openstreetmap.org") to another one, so a
+        self-hosted mirror or a local stand-in server can replace a provider without touching
+        the callers.
+    '''
+
+    def __init__(self, timeout = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 backoff: float = BACKOFF_SECONDS, max_per_host: int = MAX_PER_HOST,
+                 origins: dict[str, str] | None = None, headers: dict | None = None, sleep = time.sleep):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_per_host = max_per_host
+        self.origins = {origin.rstrip('/'): target.rstrip('/') for origin, target in (origins or {}).items()}
+        self._sleep = sleep
+        self._lock = Lock()
+        self._limits: dict[str, BoundedSemaphore] = {}
+        self._metrics: dict[str, _HostMetrics] = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max_per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def _rewrite(self, url: str) -> str:
+        parts = urlsplit(url)
+        target = self.origins.get(f'{parts.scheme}://{parts.netloc}')
+        if target is None:
+            return url
+        return target + url[len(parts.scheme) + 3 + len(parts.netloc):]
+
+    def _host(self, host: str) -> tuple[BoundedSemaphore, _HostMetrics]:
+        with self._lock:
+            if host not in self._limits:
+                self._limits[host] = BoundedSemaphore(self.max_per_host)
+                self._metrics[host] = _HostMetrics()
+            return self._limits[host], self._metrics[host]
+
+    def _delay(self, attempt: int, response: requests.Response | None) -> float | None:
+        '''
+            Seconds to wait before the next attempt, or None when the server asked for a longer
+            pause than we are willing to block for.
+        '''
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            delay = float(retry_after)
+            return delay if delay <= MAX_BACKOFF_SECONDS else None
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff * 2 ** attempt))
+
+    def request(self, method: str, url: str, retries: int | None = None, limiter = None,
+                **kwargs) -> requests.Response:
+        '''
+            Send a request; returns the last response (callers check the status) or raises the
+            last requests.RequestException once retries are exhausted. `limiter` (anything with
+            acquire()) is taken before every retry; the first attempt is paced by the caller.
+        '''
+        url = self._rewrite(url)
+        retries = self.retries if retries is None else retries
+        kwargs.setdefault('timeout', self.timeout)
+        limit, metrics = self._host(urlsplit(url).netloc)
+
+        for attempt in range(retries + 1):
+            response = None
+            started = time.perf_counter()
+            try:
+                with limit:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                with self._lock:
+                    metrics.errors += 1
+                if attempt == retries:
+                    raise
+            finally:
+                with self._lock:
+                    metrics.requests += 1
+                    metrics.latencies.append(time.perf_counter() - started)
+
+            if response is not None and (response.status_code not in RETRY_STATUSES or attempt == retries):
+                return response
+
+            delay = self._delay(attempt, response)
+            if delay is None:
+                return response
+
+            with self._lock:
+                metrics.retries += 1
+            self._sleep(delay)
+            if limiter is not None:
+                limiter.acquire()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {host: metrics.to_dict() for host, metrics in self._metrics.items()}
+
+    def close(self):
+        self.session.close()
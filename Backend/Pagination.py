@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Callable, Final
+from sqlalchemy import tuple_
+from CustomHttpException import exception_raiser
+import base64
+import json
+
+DEFAULT_LIMIT: Final[int] = 20
+MAX_LIMIT: Final[int] = 100
+
+def _encode_value(value):
+    # Timestamp columns (created_at) travel as tagged ISO strings and come back as datetimes.
+    return {"dt": value.isoformat()} if isinstance(value, datetime) else value
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(values) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _expected_type(column) -> type | None:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+def _matches(value, expected: type | None) -> bool:
+    if expected is None:
+        return True
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+def decode_cursor(cursor: str | None, columns) -> list | None:
+    '''
+        Turn an opaque cursor back into the sort key it was built from.
+        Raises a 400 when the cursor was tampered with or belongs to another sort, including
+        values whose type does not fit their column.
+    '''
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = [_decode_value(v) for v in json.loads(base64.urlsafe_b64decode(padded.encode()))]
+    except (ValueError, TypeError, KeyError):
+        values = None
+
+    valid = (
+        isinstance(values, list) and len(values) == len(columns)
+        and all(_matches(value, _expected_type(column)) for value, column in zip(values, columns))
+    )
+    exception_raiser(not valid, "error", "Invalid cursor", 400)
+    return values
+
+def parse_limit(raw, default: int = DEFAULT_LIMIT) -> int:
+    try:
+        limit = int(raw) if raw is not None else default
+    except (TypeError, ValueError):
+        limit = default
+
+    return max(1, min(limit, MAX_LIMIT))
+
+def keyset_query(query, columns, cursor: str | None, descending: bool = False):
+    '''
+        `query` (a Query or a select()) restricted to the rows after the cursor and ordered by
+        `columns`. Rows after the cursor are selected with a row-value comparison, so every page
+        is an index range scan no matter how deep the client pages.
+    '''
+    after = decode_cursor(cursor, columns)
+    sort_key = tuple_(*columns)
+
+    if after is not None:
+        query = query.filter(sort_key < tuple_(*after) if descending else sort_key > tuple_(*after))
+
+    return query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+def keyset_page(query, columns, cursor: str | None, limit: int, descending: bool = False,
+                key: Callable | None = None):
+    '''
+        Fetch one page of `query` ordered by `columns` (the last one must be unique, usually the id).
+        `key` extracts the sort values from a result row when they are not plain attributes of it.
+        Returns (items, next_cursor); next_cursor is None on the last page.
+    '''
+    items = keyset_query(query, columns, cursor, descending).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = row_cursor(items[-1], columns, key)
+
+    return items, next_cursor
+
+def row_cursor(item, columns, key: Callable | None = None) -> str:
+    '''
+        Cursor pointing just past item.
+    '''
+    return encode_cursor(key(item) if key is not None else _row_key(item, columns))
+
+def paginate(query, columns, args, descending: bool = False, key: Callable | None = None):
+    '''
+        keyset_page driven by the request's ?cursor= and ?limit= arguments, for history listings
+        (rides, bookings, reviews) ordered by (time, id).
+    '''
+    return keyset_page(query, columns, args.get("cursor"), parse_limit(args.get("limit")), descending, key)
+
+def _row_key(item, columns) -> list:
+    return [getattr(item, c.key) for c in columns]
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from typing import Final
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smallest body worth compressing; below this the headers cost more than they save.
+MIN_COMPRESS_BYTES: Final[int] = 512
+
+@dataclass(frozen=True)
+class PreparedResponse:
+    '''
+        A JSON body serialized once, with its compressed variants and a content hash.
+        Built when the data changes, so serving it is a dict lookup and a header check.
+    '''
+    etag: str
+    bodies: dict[str, bytes]
+    mimetype: str = 'application/json'
+
+    @staticmethod
+    def from_json(payload) -> 'PreparedResponse':
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        bodies = {'identity': body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            bodies['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                bodies['br'] = brotli.compress(body, quality=11)
+
+        # Weak: every encoding of the same JSON shares one validator.
+        etag = 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        return PreparedResponse(etag, bodies)
+
+    def not_modified(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        return '*' in tags or self.etag in tags or self.etag.removeprefix('W/') in tags
+
+    def negotiate(self, accept_encoding: str | None) -> tuple[str, bytes]:
+        '''
+            (encoding, body) for the client's Accept-Encoding, preferring brotli over gzip.
+        '''
+        accepted = set()
+        for part in (accept_encoding or '').split(','):
+            coding, *params = [piece.strip() for piece in part.split(';')]
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0
+            # q=0, q=0.0, q=0.000 ... all mean "not acceptable".
+            if coding and quality > 0:
+                accepted.add(coding.lower())
+        for encoding in ('br', 'gzip'):
+            if encoding in accepted and encoding in self.bodies:
+                return encoding, self.bodies[encoding]
+        return 'identity', self.bodies['identity']
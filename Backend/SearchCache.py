@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Final
+import time
+
+MAX_ENTRIES: Final[int] = 1024
+# Kept short on purpose: invalidation only reaches this process, so the TTL is how long another
+# worker can list a ride with an old seat count or miss a new one. A minute still absorbs the
+# bursts of identical searches the cache is for.
+TTL_SECONDS: Final[float] = 60.0
+
+def route_key(source: str, destination: str, day) -> tuple[str, str, str]:
+    '''
+        Cache key of a route on a given day. `day` is either a "YYYY-MM-DD" string or a unix timestamp.
+    '''
+    if isinstance(day, int):
+        day = datetime.fromtimestamp(day)
+    else:
+        day = datetime.strptime(day, "%Y-%m-%d")
+    return source, destination, day.strftime("%Y-%m-%d")
+
+class SearchCache:
+    '''
+        Bounded LRU + TTL cache for ride search results keyed by (source, destination, day).
+
+        Writers call `invalidate` after committing. Every invalidation stamps the key with a new
+        generation, and `put` drops values computed under an older generation, so a search that
+        raced a write can never re-insert stale rides. Generation stamps are forgotten in bulk by
+        raising a floor, which only ever makes `put` more conservative.
+
+        The cache is per process. `invalidate` is exact for the worker that made the change; the
+        other workers see it once their entry expires (TTL_SECONDS). Results are only a listing:
+        booking and accepting recheck seats in the database, so a stale entry can never oversell.
+    '''
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS, clock = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+        self._generations: dict[tuple, int] = {}
+        self._generation = 0
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        '''
+            Returns (value, generation). value is None on a miss; pass generation back to `put`.
+        '''
+        with self._lock:
+            generation = self._generations.get(key, self._floor)
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], generation
+
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+
+            self.misses += 1
+            return None, generation
+
+    def put(self, key, value, generation: int):
+        with self._lock:
+            if self._generations.get(key, self._floor) != generation:
+                return
+
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self._generations[key] = self._generation
+            self._entries.pop(key, None)
+            self.invalidations += 1
+
+            if len(self._generations) > 4 * self.max_entries:
+                self._generations.clear()
+                self._floor = self._generation
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._floor = self._generation
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+RIDE_SEARCH_CACHE: Final[SearchCache] = SearchCache()
+
+def ride_key(ride) -> tuple[str, str, str]:
+    '''
+        Cache key a ride is listed under. Take it before committing, while the ride is still loaded.
+    '''
+    return route_key(ride.source, ride.destination, ride.departure_date)
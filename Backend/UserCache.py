@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from typing import Final
+
+from flask import g, has_app_context
+from flask_jwt_extended import get_jwt_identity
+
+from database import db
+from models.User import User
+from models.enums import UserRole
+from SearchCache import SearchCache
+
+MAX_USERS: Final[int] = 4096
+# Other worker processes keep their own copy, so this is also how long they may show an old profile.
+TTL_SECONDS: Final[float] = 300.0
+
+@dataclass(frozen=True)
+class CachedUser:
+    '''
+        Read-only copy of a users row, safe to share between requests and threads. It carries no
+        password hash: handlers that change a user load the ORM row and call `invalidate_user`.
+    '''
+    id: int
+    role: int
+    username: str
+    email: str
+    last_name: str
+    first_name: str
+
+    COLUMNS = (User.id, User.role, User.username, User.email, User.last_name, User.first_name)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "username": self.username,
+            "email": self.email,
+            "last_name": self.last_name,
+            "first_name": self.first_name,
+            "role": self.role,
+        }
+
+    def is_driver(self) -> bool:
+        return self.role == UserRole.DRIVER
+
+    def get_identity(self) -> str:
+        return str(self.id)
+
+    def get_additional_claims(self) -> dict:
+        return {
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "username": self.username,
+            "role": self.role
+        }
+
+class UserCache(SearchCache):
+    '''
+        Per-process LRU + TTL cache of users by id, with SearchCache's generation check so a
+        lookup that raced an update cannot re-insert the old row. `request_hits` counts reads
+        answered by the copy already attached to the current request.
+    '''
+
+    def __init__(self, max_entries: int = MAX_USERS, ttl: float = TTL_SECONDS, **kwargs):
+        super().__init__(max_entries, ttl, **kwargs)
+        self.request_hits = 0
+
+    def request_hit(self):
+        with self._lock:
+            self.request_hits += 1
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self.request_hits = 0
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            stats["request_hits"] = self.request_hits
+            stats["db_lookups_saved"] = self.hits + self.request_hits
+        return stats
+
+USER_CACHE: Final[UserCache] = UserCache()
+
+def load_user(user_id) -> CachedUser | None:
+    '''
+        The user with this id, from the cache or one column-selecting query. None if there is none.
+    '''
+    key = int(user_id)
+    user, generation = USER_CACHE.get(key)
+    if user is None:
+        row = db.session.execute(db.select(*CachedUser.COLUMNS).where(User.id == key)).first()
+        if row is None:
+            return None
+        user = CachedUser(*row)
+        USER_CACHE.put(key, user, generation)
+    return user
+
+def current_user() -> CachedUser | None:
+    '''
+        The authenticated user of this request, looked up at most once per request.
+        Call after the JWT has been verified.
+    '''
+    identity = get_jwt_identity()
+    if identity is None:
+        return None
+
+    user = g.get("current_user")
+    if user is not None and user.id == int(identity):
+        USER_CACHE.request_hit()
+        return user
+
+    user = g.current_user = load_user(identity)
+    return user
+
+def invalidate_user(user_id):
+    '''
+        Forget a user after committing a change to their row (profile, role).
+    '''
+    USER_CACHE.invalidate(int(user_id))
+    if has_app_context():
+        g.pop("current_user", None)
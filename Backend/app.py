@@ -3,18 +3,23 @@ from flask import Flask
 from dotenv import load_dotenv
 from flask_jwt_extended import JWTManager
 from sqlalchemy import text
-from database import db
+from database import LEGACY_TIMESTAMP, backfill_not_null, db
 import argparse
 
 from blueprints.UserProfile import user_profile
 from blueprints.Cities import cities
-from blueprints.Rides import rides
+from blueprints.Rides import rides, load_connections
 from blueprints.Bookings import bookings
 from blueprints.Reviews import reviews
 from blueprints.DriverAccess import driver_access
 from blueprints.userAccess import user_access
 from blueprints import ChatService
 import FetchCities
+import ExpirySweeper
+from models.RatingStats import RatingStats
+from models.RideOffer import RideOffer
+from models.Booking import Booking
+from models.Review import Review
 
 load_dotenv()
 
@@ -59,15 +64,42 @@ def setup_db(app: Flask, reset_db: bool = False):
 
         db.create_all()
         print("Created all tables.")
+        # Keyset cursors cannot carry a NULL timestamp.
+        for column in (Booking.created_at, Review.created_at):
+            backfill_not_null(column, LEGACY_TIMESTAMP)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the Flask app.")
     parser.add_argument("--reset-db", action="store_true", help="Drop and recreate all tables.")
+    parser.add_argument("--build-distance-matrix", metavar="COUNTRY", help="Precompute the city distance matrix of a country and exit.")
+    parser.add_argument("--rebuild-rating-stats", action="store_true", help="Recompute rating summaries from reviews and exit.")
     args = parser.parse_args()
 
     app = create_app()
     setup_db(app, args.reset_db)
+    if args.rebuild_rating_stats:
+        with app.app_context():
+            print(f"Rebuilt rating stats for {RatingStats.rebuild()} users.")
+        raise SystemExit(0)
     print("Registered tables:", db.Model.metadata.tables.keys())
+    FetchCities.use_geocode_cache(os.getenv("GEOCODE_CACHE_PATH", FetchCities.GEOCODE_CACHE_PATH))
+    if args.build_distance_matrix:
+        FetchCities.prefetch(args.build_distance_matrix)
+        print(f"Distance matrix covers {FetchCities.build_distance_matrix(args.build_distance_matrix)} cities.")
+        raise SystemExit(0)
+
     FetchCities.prefetch('romania')
+    FetchCities.load_distance_matrix('romania')
+    if os.getenv("GAZETTEER_PATH"):
+        places = FetchCities.load_gazetteer(os.getenv("GAZETTEER_PATH"), os.getenv("NOMINATIM_FALLBACK", "1") != "0")
+        print(f"Loaded {places} gazetteer places.")
+    with app.app_context():
+        endpoints = {city for (city,) in db.session.query(RideOffer.source).distinct()}
+        endpoints |= {city for (city,) in db.session.query(RideOffer.destination).distinct()}
+    FetchCities.index_places(sorted(endpoints), 'Romania')
+    with app.app_context():
+        ExpirySweeper.sweep()
+        load_connections()
+    ExpirySweeper.start(app)
     ChatService.preload()
     app.run(host=os.getenv("host"), port=int(os.getenv("port")), debug=True, use_reloader=False)
@@ -0,0 +1,69 @@
+"""
+Connection search on 100k synthetic rides.
+
+    python benchmarks/bench_connections.py [--rides 100000] [--cities 300] [--queries 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ConnectionGraph import ConnectionGraph, Leg
+
+HOUR = 3600
+WEEK = 7 * 24 * HOUR
+
+def build_legs(rides: int, cities: int, seed: int = 7) -> list[Leg]:
+    rng = random.Random(seed)
+    names = [f"city{i}" for i in range(cities)]
+    legs = []
+    for ride_id in range(1, rides + 1):
+        source, destination = rng.sample(names, 2)
+        departure = rng.randrange(0, WEEK)
+        legs.append(Leg(ride_id, source, destination, departure, departure + rng.randrange(HOUR, 6 * HOUR),
+                        rng.randrange(0, 5)))
+    return legs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rides", type=int, default=100_000)
+    parser.add_argument("--cities", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    legs = build_legs(args.rides, args.cities)
+    graph = ConnectionGraph()
+
+    started = time.perf_counter()
+    for leg in legs:
+        graph.add(leg)
+    build = time.perf_counter() - started
+
+    rng = random.Random(11)
+    timings, found = [], 0
+    for _ in range(args.queries):
+        origin, target = rng.sample([f"city{i}" for i in range(args.cities)], 2)
+        started = time.perf_counter()
+        journey = graph.earliest_arrival(origin, target, rng.randrange(0, WEEK - 2 * 24 * HOUR))
+        timings.append(time.perf_counter() - started)
+        found += journey is not None
+
+    started = time.perf_counter()
+    for leg in legs[:1000]:
+        graph.remove(leg.ride_id)
+        graph.add(leg)
+    churn = (time.perf_counter() - started) / 2000
+
+    timings.sort()
+    print(f"rides={args.rides} cities={args.cities}")
+    print(f"incremental build: {build:.2f}s ({build / args.rides * 1e6:.1f} us/ride)")
+    print(f"add/remove one ride: {churn * 1e6:.1f} us")
+    print(f"queries: {args.queries}, journeys found: {found}")
+    print(f"query latency: mean {statistics.mean(timings) * 1e3:.2f} ms, "
+          f"p50 {timings[len(timings) // 2] * 1e3:.2f} ms, p95 {timings[int(len(timings) * 0.95)] * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Scalar FetchCities.distance against the NumPy batch API and the precomputed matrix.
+
+    python benchmarks/bench_distance.py [--cities 3000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import FetchCities
+from DistanceMatrix import CityDistanceMatrix, many_to_many, one_to_many
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cities", type=int, default=3000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    locations = {f"city{i}": (rng.uniform(43.6, 48.3), rng.uniform(20.2, 29.7)) for i in range(args.cities)}
+    points = list(locations.values())
+    n = len(points)
+
+    _, scalar_row = timed(lambda: [FetchCities.distance(points[0], p) for p in points])
+    _, batch_row = timed(lambda: one_to_many(points[0], points))
+    print(f"one-to-many ({n}):    scalar {scalar_row * 1e3:8.2f} ms   numpy {batch_row * 1e3:8.2f} ms"
+          f"   x{scalar_row / batch_row:.0f}")
+
+    sample = points[:500]
+    _, scalar_matrix = timed(lambda: [[FetchCities.distance(a, b) for b in sample] for a in sample])
+    _, batch_matrix = timed(lambda: many_to_many(sample, sample))
+    print(f"many-to-many (500^2): scalar {scalar_matrix * 1e3:8.2f} ms   numpy {batch_matrix * 1e3:8.2f} ms"
+          f"   x{scalar_matrix / batch_matrix:.0f}")
+
+    matrix, build = timed(lambda: CityDistanceMatrix.build(locations))
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix.save(os.path.join(tmp, "bench"))
+        mapped, load = timed(lambda: CityDistanceMatrix.load(os.path.join(tmp, "bench")))
+
+        names = list(locations)
+        pairs = [(rng.choice(names), rng.choice(names)) for _ in range(100_000)]
+        _, scalar_pairs = timed(lambda: [FetchCities.distance(locations[a], locations[b]) for a, b in pairs])
+        _, lookup_pairs = timed(lambda: [mapped.get(a, b) for a, b in pairs])
+
+    print(f"all-pairs build ({n}^2): {build * 1e3:.0f} ms, mmap load {load * 1e3:.2f} ms, "
+          f"{matrix.matrix.nbytes / 2 ** 20:.1f} MiB")
+    print(f"100k pair lookups:    scalar {scalar_pairs * 1e3:8.2f} ms   matrix {lookup_pairs * 1e3:8.2f} ms"
+          f"   ({lookup_pairs / len(pairs) * 1e9:.0f} ns/lookup)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Booking requests: check-then-insert against insert_unique, half of them duplicates.
+
+    python benchmarks/bench_inserts.py [--requests 5000] [--duplicates 0.5] [--fallback]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from flask import Flask
+from sqlalchemy import event
+
+import database
+from database import db, insert_unique
+from models.Booking import Booking
+from models.RideOffer import RideOffer
+from models.User import User
+
+def check_then_insert(ride_id: int, passenger_id: int) -> Booking | None:
+    if Booking.query.filter_by(ride_id=ride_id, passenger_id=passenger_id).first():
+        return None
+    booking = Booking(ride_id=ride_id, passenger_id=passenger_id)
+    db.session.add(booking)
+    db.session.flush()
+    return booking
+
+def insert_first(ride_id: int, passenger_id: int) -> Booking | None:
+    return insert_unique(Booking, ride_id=ride_id, passenger_id=passenger_id)
+
+def run(app: Flask, strategy, pairs: list[tuple[int, int]]) -> tuple[float, int, int]:
+    statements = []
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(id=1, role=1, username="driver", password="x", email="d@x", last_name="D", first_name="D"))
+        db.session.add(RideOffer(id=1, author_id=1, source="Iasi", destination="Cluj", departure_date=0, price=1,
+                                 available_seats=len(pairs)))
+        db.session.commit()
+
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        started = time.perf_counter()
+        created = 0
+        for ride_id, passenger_id in pairs:
+            created += strategy(ride_id, passenger_id) is not None
+            db.session.commit()
+        elapsed = time.perf_counter() - started
+        event.remove(db.engine, "before_cursor_execute", listener)
+    return elapsed, created, len(statements)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--duplicates", type=float, default=0.5)
+    parser.add_argument("--fallback", action="store_true", help="use the savepoint path instead of ON CONFLICT")
+    args = parser.parse_args()
+
+    if args.fallback:
+        database.ON_CONFLICT_DIALECTS = {}
+
+    rng = random.Random(3)
+    passengers = max(1, int(args.requests * (1 - args.duplicates)))
+    pairs = [(1, rng.randrange(passengers) + 2) for _ in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        db.init_app(app)
+
+        print(f"requests={args.requests} distinct passengers={passengers} "
+              f"path={'savepoint' if args.fallback else 'on conflict'}")
+        for name, strategy in (("check-then-insert", check_then_insert), ("insert_unique", insert_first)):
+            elapsed, created, statements = run(app, strategy, pairs)
+            print(f"{name:>18}: {elapsed:.2f}s ({elapsed / args.requests * 1e6:.0f} us/request), "
+                  f"{statements / args.requests:.2f} statements/request, {created} created")
+
+if __name__ == "__main__":
+    main()
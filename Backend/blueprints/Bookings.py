@@ -1,21 +1,61 @@
 from flask import Blueprint, jsonify, render_template, abort, request
 from flask_jwt_extended import get_jwt_identity
-from database import db
+from database import db, insert_unique
 from models.Booking import Booking
 from models.RideOffer import RideOffer
 from models.Review import Review
+from models.RatingStats import RatingStats
 from models.User import User
 from models.enums import BookingStatus
 from CustomJWTRequired import jwt_noapi_required
 from CustomHttpException import exception_raiser
 from CustomHttpException import CustomHttpException
 from jinja2 import TemplateNotFound
-from sqlalchemy import or_
+from sqlalchemy import and_, case, or_
+from sqlalchemy.orm import aliased, contains_eager, joinedload
 
-from blueprints.Rides import get_jwt_user, base_context_from_jwt, format_ts
+from SearchCache import RIDE_SEARCH_CACHE, ride_key
+from ConnectionGraph import CONNECTIONS
+import Pagination
+from blueprints.Rides import get_jwt_user, base_context_from_jwt, format_ts, wants_json
 
 bookings = Blueprint("bookings", __name__, url_prefix="/bookings")
 
+MAX_BULK_DECISIONS = 100
+DECISIONS = ("accept", "deny")
+
+
+def booking_dict(b: Booking) -> dict:
+    return {
+        "id": b.id,
+        "ride_id": b.ride_id,
+        "status": b.status,
+        "source": b.ride.source,
+        "destination": b.ride.destination,
+        "departure_date": b.ride.departure_date,
+    }
+
+
+def person_dict(user: User) -> dict:
+    return {"id": user.id, "username": user.username, "first_name": user.first_name, "last_name": user.last_name}
+
+
+def mark_reviewed(bookings_list, reviewer_id: int):
+    """
+    Set has_reviewed/review_id on every booking from one query over the reviewer's reviews,
+    instead of one lookup per booking.
+    """
+    booking_ids = [b.id for b in bookings_list]
+    review_ids = dict(
+        db.session.query(Review.booking_id, Review.id)
+        .filter(Review.reviewer_id == reviewer_id, Review.booking_id.in_(booking_ids))
+        .all()
+    ) if booking_ids else {}
+
+    for b in bookings_list:
+        b.review_id = review_ids.get(b.id)
+        b.has_reviewed = b.review_id is not None
+
 
 @bookings.get("/incoming")
 @jwt_noapi_required
@@ -23,32 +63,48 @@ def incoming_bookings():
     try:
         user_id, jwt_map = get_jwt_user(require_driver=True)
 
-        bookings_list = (
-            Booking.query
-            .join(RideOffer)
+        # One statement: ride and passenger come eagerly, ratings from the outer-joined summary row.
+        rows = (
+            db.session.query(Booking, RatingStats)
+            .join(Booking.ride)
+            .outerjoin(RatingStats, RatingStats.user_id == Booking.passenger_id)
+            .options(contains_eager(Booking.ride), joinedload(Booking.passenger))
             .filter(
                 RideOffer.author_id == user_id,
                 Booking.status == BookingStatus.PENDING
             )
-            .all()
+        )
+        rows, next_cursor = Pagination.paginate(
+            rows, [RideOffer.departure_date, Booking.id], request.args,
+            key=lambda row: (row.Booking.ride.departure_date, row.Booking.id)
         )
 
-        for b in bookings_list:
+        bookings_list = []
+        for b, stats in rows:
             b.departure_display = format_ts(b.ride.departure_date)
-            # Calculate passenger's average rating
-            passenger_reviews = Review.query.filter_by(reviewed_id=b.passenger_id).all()
-            if passenger_reviews:
-                b.passenger_avg_rating = round(sum(rev.rating for rev in passenger_reviews) / len(passenger_reviews), 2)
-                b.passenger_total_reviews = len(passenger_reviews)
-            else:
-                b.passenger_avg_rating = 0
-                b.passenger_total_reviews = 0
+            b.passenger_avg_rating, b.passenger_total_reviews = (stats.average, stats.review_count) if stats else (0, 0)
+            bookings_list.append(b)
+
+        if wants_json():
+            content = [
+                {
+                    **booking_dict(b),
+                    "passenger": person_dict(b.passenger),
+                    "passenger_avg_rating": b.passenger_avg_rating,
+                    "passenger_total_reviews": b.passenger_total_reviews,
+                }
+                for b in bookings_list
+            ]
+            return jsonify({"status": "success", "content": content, "next_cursor": next_cursor}), 200
 
         return render_template(
             "bookings/incoming_bookings.html",
             bookings=bookings_list,
+            next_cursor=next_cursor,
             **base_context_from_jwt(jwt_map)
         )
+    except CustomHttpException as e:
+        return jsonify({'status': e.status, "message": str(e)}), e.status_code
     except TemplateNotFound:
         abort(404)
 
@@ -86,17 +142,11 @@ def accepted_driver_bookings():
                 )
             )
 
-        bookings_list = query.all()
+        bookings_list = query.options(contains_eager(Booking.ride), contains_eager(Booking.passenger)).all()
 
+        mark_reviewed(bookings_list, user_id)
         for b in bookings_list:
             b.departure_display = format_ts(b.ride.departure_date)
-            # Check if driver has already reviewed this booking
-            existing_review = Review.query.filter_by(
-                booking_id=b.id,
-                reviewer_id=user_id
-            ).first()
-            b.has_reviewed = existing_review is not None
-            b.review_id = existing_review.id if existing_review else None
 
         return render_template(
             "bookings/accepted_driver_bookings.html",
@@ -115,25 +165,33 @@ def my_bookings():
     try:
         user_id, jwt_map = get_jwt_user()
 
-        bookings_list = Booking.query.filter_by(
-            passenger_id=user_id
-        ).all()
+        # Newest first over ix_booking_passenger_created.
+        bookings_list, next_cursor = Pagination.paginate(
+            Booking.query
+            .options(joinedload(Booking.ride).joinedload(RideOffer.author))
+            .filter_by(passenger_id=user_id),
+            [Booking.created_at, Booking.id], request.args, descending=True
+        )
 
+        mark_reviewed(bookings_list, user_id)
         for b in bookings_list:
             b.departure_display = format_ts(b.ride.departure_date)
-            # Check if user has already reviewed this booking
-            existing_review = Review.query.filter_by(
-                booking_id=b.id,
-                reviewer_id=user_id
-            ).first()
-            b.has_reviewed = existing_review is not None
-            b.review_id = existing_review.id if existing_review else None
+
+        if wants_json():
+            content = [
+                {**booking_dict(b), "driver": person_dict(b.ride.author), "review_id": b.review_id}
+                for b in bookings_list
+            ]
+            return jsonify({"status": "success", "content": content, "next_cursor": next_cursor}), 200
 
         return render_template(
             "bookings/my_bookings.html",
             bookings=bookings_list,
+            next_cursor=next_cursor,
             **base_context_from_jwt(jwt_map)
         )
+    except CustomHttpException as e:
+        return jsonify({'status': e.status, "message": str(e)}), e.status_code
     except TemplateNotFound:
         abort(404)
 
@@ -145,25 +203,12 @@ def request_booking(ride_id):
 
         ride: RideOffer = db.session.get(RideOffer, ride_id)
         exception_raiser(not ride, "error", "Ride not found", 404)
+        exception_raiser(not ride.active, "error", "Ride is no longer available", 400)
         exception_raiser(ride.available_seats <= 0, "error", "No seats available", 400)
 
-        exception_raiser(
-            Booking.query.filter_by(
-                ride_id=ride.id,
-                passenger_id=user_id
-            ).first(),
-            "error",
-            "Already booked",
-            400
-        )
-
-        booking = Booking(
-            ride_id=ride.id,
-            passenger_id=user_id,
-            status=BookingStatus.PENDING
-        )
-
-        db.session.add(booking)
+        # uq_booking_ride_passenger decides "already booked"; no SELECT beforehand.
+        booking = insert_unique(Booking, ride_id=ride.id, passenger_id=user_id, status=BookingStatus.PENDING)
+        exception_raiser(booking is None, "error", "Already booked", 400)
         db.session.commit()
 
         return jsonify({"message": "Booking request sent"}), 201
@@ -171,23 +216,206 @@ def request_booking(ride_id):
         return jsonify({'status': e.status, "message": str(e)}), e.status_code
 
 
+def take_seat(ride_id: int, count: int = 1) -> int | None:
+    """
+    Atomically reserve count seats: a single conditional UPDATE, so concurrent accepts can
+    never oversell. Returns the seats left, or None if fewer than count were free.
+    """
+    return db.session.execute(
+        db.update(RideOffer)
+        .where(RideOffer.id == ride_id, RideOffer.available_seats >= count)
+        .values(available_seats=RideOffer.available_seats - count)
+        .returning(RideOffer.available_seats)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def take_seats(ride_id: int, count: int) -> tuple[int, int | None]:
+    """
+    Reserve up to count seats in one UPDATE: the ride row is read with FOR UPDATE and the
+    UPDATE only applies if the count is still the one read, so it is safe even where FOR UPDATE
+    is a no-op (SQLite). Returns (seats granted, seats left), or (0, None) when the ride is full.
+    """
+    while True:
+        available = db.session.execute(
+            db.select(RideOffer.available_seats).where(RideOffer.id == ride_id).with_for_update()
+        ).scalar()
+        if not available:
+            return 0, None
+
+        granted = min(count, available)
+        seats_left = db.session.execute(
+            db.update(RideOffer)
+            .where(RideOffer.id == ride_id, RideOffer.available_seats == available)
+            .values(available_seats=available - granted)
+            .returning(RideOffer.available_seats)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if seats_left is not None:
+            return granted, seats_left
+
+
+def transition_pending(booking_ids, status) -> set[int]:
+    """
+    Move the still-pending bookings among booking_ids to status; returns the ids that moved.
+    """
+    if not booking_ids:
+        return set()
+    return set(db.session.execute(
+        db.update(Booking)
+        .where(Booking.id.in_(booking_ids), Booking.status == BookingStatus.PENDING)
+        .values(status=status)
+        .returning(Booking.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+
+
+def release_seat(ride_id: int) -> int | None:
+    return db.session.execute(
+        db.update(RideOffer)
+        .where(RideOffer.id == ride_id)
+        .values(available_seats=RideOffer.available_seats + 1)
+        .returning(RideOffer.available_seats)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
 @bookings.post("/accept/<int:booking_id>")
 @jwt_noapi_required
 def accept_booking(booking_id):
-    user_id, _jwt_map = get_jwt_user(require_driver=True)
+    try:
+        user_id, _jwt_map = get_jwt_user(require_driver=True)
 
-    booking = db.session.get(Booking, booking_id)
-    exception_raiser(not booking, "error", "Booking not found", 404)
+        booking = db.session.get(Booking, booking_id)
+        exception_raiser(not booking, "error", "Booking not found", 404)
 
-    ride = booking.ride
-    exception_raiser(ride.author_id != user_id, "error", "Not your ride", 403)
-    exception_raiser(ride.available_seats <= 0, "error", "No seats left", 400)
+        ride = booking.ride
+        exception_raiser(ride.author_id != user_id, "error", "Not your ride", 403)
+        ride_id, cache_key = ride.id, ride_key(ride)
 
-    booking.status = BookingStatus.ACCEPTED
-    ride.available_seats -= 1
-    db.session.commit()
+        # The status transition and the seat decrement commit together or not at all; the
+        # affected-row counts, not values read earlier, decide who gets the last seat.
+        transitioned = db.session.execute(
+            db.update(Booking)
+            .where(Booking.id == booking_id, Booking.status == BookingStatus.PENDING)
+            .values(status=BookingStatus.ACCEPTED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        exception_raiser(not transitioned, "error", "Booking is not pending", 409)
+
+        seats_left = take_seat(ride_id)
+        exception_raiser(seats_left is None, "error", "No seats left", 400)
 
-    return jsonify({"message": "Booking accepted"}), 200
+        db.session.commit()
+        RIDE_SEARCH_CACHE.invalidate(cache_key)
+        CONNECTIONS.set_seats(ride_id, seats_left)
+
+        return jsonify({"message": "Booking accepted"}), 200
+    except CustomHttpException as e:
+        db.session.rollback()
+        return jsonify({'status': e.status, "message": str(e)}), e.status_code
+
+
+@bookings.post("/decide")
+@jwt_noapi_required
+def decide_bookings():
+    """
+    Accept or deny many pending bookings at once:
+    {"decisions": [{"booking_id": 1, "decision": "accept"}, {"booking_id": 2, "decision": "deny"}]}.
+
+    Ownership is checked with one query and everything commits in one transaction. Accepts
+    are granted in request order while seats last. The response has one result per booking.
+    """
+    try:
+        user_id, _jwt_map = get_jwt_user(require_driver=True)
+
+        decisions = (request.get_json(silent=True) or {}).get("decisions")
+        exception_raiser(not isinstance(decisions, list) or not decisions, "error",
+                         "decisions must be a non-empty list", 400)
+        exception_raiser(len(decisions) > MAX_BULK_DECISIONS, "error",
+                         f"At most {MAX_BULK_DECISIONS} decisions per request", 400)
+
+        wanted: dict[int, str] = {}
+        for item in decisions:
+            booking_id = item.get("booking_id") if isinstance(item, dict) else None
+            decision = item.get("decision") if isinstance(item, dict) else None
+            exception_raiser(type(booking_id) is not int or decision not in DECISIONS, "error",
+                             "Each decision needs an integer booking_id and accept or deny", 400)
+            exception_raiser(booking_id in wanted, "error", f"Booking {booking_id} appears twice", 400)
+            wanted[booking_id] = decision
+
+        rows = (
+            db.session.query(Booking.id, Booking.status, RideOffer)
+            .join(RideOffer, Booking.ride_id == RideOffer.id)
+            .filter(Booking.id.in_(wanted))
+            .all()
+        )
+
+        results = {booking_id: (404, "Booking not found") for booking_id in wanted}
+        rides_by_booking = {}
+        for booking_id, status, ride in rows:
+            if ride.author_id != user_id:
+                results[booking_id] = (403, "Not your ride")
+            elif status != BookingStatus.PENDING:
+                results[booking_id] = (409, "Booking is not pending")
+            else:
+                rides_by_booking[booking_id] = ride
+
+        def decided(decision):
+            return [booking_id for booking_id in wanted if booking_id in rides_by_booking and wanted[booking_id] == decision]
+
+        accepting = transition_pending(decided("accept"), BookingStatus.ACCEPTED)
+        per_ride: dict[int, list[int]] = {}
+        for booking_id in decided("accept"):
+            if booking_id in accepting:
+                per_ride.setdefault(rides_by_booking[booking_id].id, []).append(booking_id)
+            else:
+                results[booking_id] = (409, "Booking is not pending")
+
+        seats = {}
+        unseated = []
+        for ride_id, booking_ids in per_ride.items():
+            granted, seats[ride_id] = take_seats(ride_id, len(booking_ids))
+            for booking_id in booking_ids[:granted]:
+                results[booking_id] = (200, "Booking accepted")
+            for booking_id in booking_ids[granted:]:
+                results[booking_id] = (400, "No seats left")
+            unseated += booking_ids[granted:]
+
+        if unseated:
+            db.session.execute(
+                db.update(Booking)
+                .where(Booking.id.in_(unseated))
+                .values(status=BookingStatus.PENDING)
+                .execution_options(synchronize_session=False)
+            )
+
+        denied = transition_pending(decided("deny"), BookingStatus.DENIED)
+        for booking_id in decided("deny"):
+            results[booking_id] = (200, "Booking denied") if booking_id in denied else (409, "Booking is not pending")
+
+        cache_keys = {ride.id: ride_key(ride) for ride in rides_by_booking.values() if ride.id in seats}
+        db.session.commit()
+        for ride_id, seats_left in seats.items():
+            if seats_left is not None:
+                RIDE_SEARCH_CACHE.invalidate(cache_keys[ride_id])
+                CONNECTIONS.set_seats(ride_id, seats_left)
+
+        return jsonify({
+            "status": "success",
+            "content": [
+                {
+                    "booking_id": booking_id,
+                    "decision": wanted[booking_id],
+                    "status_code": code,
+                    "message": message,
+                }
+                for booking_id, (code, message) in results.items()
+            ],
+        }), 200
+    except CustomHttpException as e:
+        db.session.rollback()
+        return jsonify({'status': e.status, "message": str(e)}), e.status_code
 
 
 @bookings.post("/deny/<int:booking_id>")
@@ -207,19 +435,34 @@ def deny_booking(booking_id):
 @bookings.post("/delete/<int:booking_id>")
 @jwt_noapi_required
 def delete_booking(booking_id):
-    user_id, _jwt_map = get_jwt_user()
-
-    booking = db.session.get(Booking, booking_id)
-    exception_raiser(not booking, "error", "Booking not found", 404)
-    exception_raiser(booking.passenger_id != user_id, "error", "Not your booking", 403)
-
-    if booking.status == BookingStatus.ACCEPTED:
-        booking.ride.available_seats += 1
+    try:
+        user_id, _jwt_map = get_jwt_user()
 
-    db.session.delete(booking)
-    db.session.commit()
+        booking = db.session.get(Booking, booking_id)
+        exception_raiser(not booking, "error", "Booking not found", 404)
+        exception_raiser(booking.passenger_id != user_id, "error", "Not your booking", 403)
+        ride_id, cache_key = booking.ride_id, ride_key(booking.ride)
+
+        # Only the request that actually deletes the row learns its status, so a seat is
+        # released at most once even if the passenger double-submits.
+        status = db.session.execute(
+            db.delete(Booking)
+            .where(Booking.id == booking_id)
+            .returning(Booking.status)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        exception_raiser(status is None, "error", "Booking not found", 404)
+
+        seats_left = release_seat(ride_id) if status == BookingStatus.ACCEPTED else None
+        db.session.commit()
+        if seats_left is not None:
+            RIDE_SEARCH_CACHE.invalidate(cache_key)
+            CONNECTIONS.set_seats(ride_id, seats_left)
 
-    return jsonify({"message": "Booking deleted"}), 200
+        return jsonify({"message": "Booking deleted"}), 200
+    except CustomHttpException as e:
+        db.session.rollback()
+        return jsonify({'status': e.status, "message": str(e)}), e.status_code
 
 
 @bookings.get("/accepted")
@@ -228,51 +471,57 @@ def accepted_bookings():
     """
     Get all accepted bookings for the current user (as driver or passenger).
     This is used to show bookings that can be reviewed.
+    Newest departures first, one keyset page at a time (?cursor=&limit=).
     """
     try:
         user_id, jwt_map = get_jwt_user()
 
-        # Get bookings where user is passenger
-        passenger_bookings = Booking.query.filter_by(
-            passenger_id=user_id,
-            status=BookingStatus.ACCEPTED
-        ).all()
-
-        # Get bookings where user is driver
-        driver_bookings = (
-            Booking.query
-            .join(RideOffer)
+        # Passenger and driver bookings in one statement: the counterpart is the driver when the
+        # user rode along and the passenger otherwise, joined together with the user's review.
+        is_passenger = Booking.passenger_id == user_id
+        counterpart = aliased(User)
+        counterpart_id = case((is_passenger, RideOffer.author_id), else_=Booking.passenger_id)
+        query = (
+            db.session.query(
+                Booking,
+                RideOffer.departure_date,
+                Booking.id,
+                counterpart_id.label("review_target_id"),
+                counterpart.first_name,
+                counterpart.last_name,
+                Review.id.label("review_id"),
+            )
+            .join(Booking.ride)
+            .join(counterpart, counterpart.id == counterpart_id)
+            .outerjoin(Review, and_(Review.booking_id == Booking.id, Review.reviewer_id == user_id))
+            .options(contains_eager(Booking.ride))
             .filter(
-                RideOffer.author_id == user_id,
-                Booking.status == BookingStatus.ACCEPTED
+                Booking.status == BookingStatus.ACCEPTED,
+                or_(is_passenger, RideOffer.author_id == user_id)
             )
-            .all()
+        )
+        rows, next_cursor = Pagination.paginate(
+            query, [RideOffer.departure_date, Booking.id], request.args, descending=True
         )
 
-        all_bookings = passenger_bookings + driver_bookings
-
-        for b in all_bookings:
-            b.departure_display = format_ts(b.ride.departure_date)
-            # Check if user has already reviewed this booking
-            existing_review = Review.query.filter_by(
-                booking_id=b.id,
-                reviewer_id=user_id
-            ).first()
-            b.has_reviewed = existing_review is not None
-            b.review_id = existing_review.id if existing_review else None
-            # Determine who should be reviewed
-            if b.passenger_id == user_id:
-                b.review_target_id = b.ride.author_id
-                b.review_target_name = f"{b.ride.author.first_name} {b.ride.author.last_name}"
-            else:
-                b.review_target_id = b.passenger_id
-                b.review_target_name = f"{b.passenger.first_name} {b.passenger.last_name}"
+        all_bookings = []
+        for row in rows:
+            b = row.Booking
+            b.departure_display = format_ts(row.departure_date)
+            b.review_id = row.review_id
+            b.has_reviewed = row.review_id is not None
+            b.review_target_id = row.review_target_id
+            b.review_target_name = f"{row.first_name} {row.last_name}"
+            all_bookings.append(b)
 
         return render_template(
             "bookings/accepted_bookings.html",
             bookings=all_bookings,
+            next_cursor=next_cursor,
             **base_context_from_jwt(jwt_map)
         )
+    except CustomHttpException as e:
+        return jsonify({'status': e.status, "message": str(e)}), e.status_code
     except TemplateNotFound:
         abort(404)
 
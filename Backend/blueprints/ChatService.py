@@ -10,6 +10,8 @@ import re
 
 # MODEL_NAME: Final[str] = 'HuggingFaceTB/SmolLM2-360M-Instruct'
 MODEL_NAME: Final[str] = 'Qwen/Qwen2.5-0.5B-Instruct'
+# Country of every city list, gazetteer and distance matrix the app loads.
+COUNTRY: Final[str] = 'Romania'
 nlp = None
 
 MODEL_EVENT = threading.Event()
@@ -170,11 +172,10 @@ def chat_message():
     locations = extract_locations(text)
     if (intent in ("distance", "price")) and len(locations) >= 2:
         city_a, city_b = locations[:2]
-        distance = FetchCities.distance(
-            FetchCities.get_location(city_a, None),
-            FetchCities.get_location(city_b, None)
-        )
+        distance = FetchCities.cached_distance(city_a, city_b, COUNTRY)
 
+        if distance is None:
+            return jsonify({'reply': f'I am still looking up {city_a} and {city_b}. Please ask again in a moment.'})
         if intent == "distance":
             reply = f"The distance between {city_a} and {city_b} is approximately {distance:.2f} km."
         else:
@@ -1,17 +1,77 @@
-from flask import Blueprint, request, jsonify, current_app, abort
+from flask import Blueprint, Response, request, jsonify, current_app, abort
+from typing import Final
 import FetchCities
+import CityIndex
+from flask_jwt_extended import jwt_required
+from CustomHttpException import CustomHttpException, exception_raiser
+from models.enums import UserRole
+from blueprints.Rides import get_jwt_user
+
+CITIES_MAX_AGE: Final[int] = 3600
 
 cities = Blueprint("cities", __name__, url_prefix="/cities")
 
 @cities.get('/<string:country>')
 def get_cities(country: str):
-    try:
-        return jsonify({
-            'status': 'success',
-            'content': FetchCities.get_all(country)
-        })
-    except Exception:
+    if not FetchCities.CATALOGUE.supports(country):
+        return jsonify({'status': 'error', 'message': 'Unknown country'}), 404
+
+    prepared = FetchCities.CATALOGUE.response(country)
+    if prepared is None:
+        # Still loading in the background; the client can retry shortly.
         return jsonify({
-            'status': 'error',
+            'status': 'loading',
             'content': []
-        })
+        }), 503, {'Retry-After': '5'}
+
+    # The body, its gzip/brotli variants and the ETag were built once when the list loaded.
+    headers = {
+        'ETag': prepared.etag,
+        'Cache-Control': f'public, max-age={CITIES_MAX_AGE}',
+        'Vary': 'Accept-Encoding',
+    }
+    if prepared.not_modified(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+
+    encoding, body = prepared.negotiate(request.headers.get('Accept-Encoding'))
+    response = Response(body, mimetype=prepared.mimetype, headers=headers)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+@cities.get('/status')
+def catalogue_status():
+    return jsonify({
+        'status': 'success',
+        'content': FetchCities.CATALOGUE.status()
+    })
+
+
+@cities.get('/<string:country>/autocomplete')
+def autocomplete_cities(country: str):
+    if not FetchCities.CATALOGUE.supports(country):
+        return jsonify({'status': 'error', 'message': 'Unknown country'}), 404
+
+    query = request.args.get('q', '')
+    limit = min(request.args.get('limit', CityIndex.DEFAULT_LIMIT, type=int), 50)
+    return jsonify({
+        'status': 'success',
+        'content': FetchCities.autocomplete(country, query, limit)
+    })
+
+
+@cities.get('/geocode/stats')
+@jwt_required()
+def geocode_cache_stats():
+    try:
+        _user_id, jwt_map = get_jwt_user()
+        exception_raiser(jwt_map.get("role") != UserRole.ADMIN, "error", "Admin only", 403)
+        content = {
+            **(FetchCities.GEOCODE_CACHE.stats() if FetchCities.GEOCODE_CACHE is not None else {}),
+            'pool': FetchCities.GEOCODE_POOL.stats(),
+            'http': FetchCities.HTTP_CLIENT.stats(),
+        }
+        return jsonify({'status': 'success', 'content': content}), 200
+    except CustomHttpException as e:
+        return jsonify({'status': e.status, 'message': str(e)}), e.status_code
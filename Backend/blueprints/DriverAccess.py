@@ -1,3 +1,4 @@
+from dataclasses import replace
 from datetime import timedelta
 
 from flask import Blueprint, request, jsonify, render_template, abort
@@ -7,7 +8,9 @@ from jinja2 import TemplateNotFound
 from models.Driver import Driver
 from models.User import User
 from models.enums import UserRole
+from UserCache import current_user, invalidate_user
 from CustomHttpException import exception_raiser, CustomHttpException
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError
 
 driver_access = Blueprint("driver_access", __name__, url_prefix="/driver")
@@ -36,7 +39,7 @@ def become_driver():
     if request.method == "POST":
         try:
             user_id = int(get_jwt_identity())
-            user = User.query.get(user_id)
+            user = current_user()
             exception_raiser(user is None, "error", "User not found", 404)
 
             # Prevent duplicate driver profile
@@ -49,8 +52,10 @@ def become_driver():
             db.session.add(new_driver)
 
             # Update user role
-            user.role = UserRole.DRIVER
+            db.session.execute(update(User).where(User.id == user_id).values(role=UserRole.DRIVER))
             db.session.commit()
+            invalidate_user(user_id)
+            user = replace(user, role=UserRole.DRIVER)
 
             token = create_access_token(identity=user.get_identity(), additional_claims=user.get_additional_claims(),
                                         expires_delta=timedelta(days=1))
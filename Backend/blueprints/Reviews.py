@@ -1,7 +1,8 @@
-from flask import Blueprint, jsonify, render_template, abort, request
+from flask import Blueprint, Response, jsonify, render_template, abort, request, stream_with_context
 from flask_jwt_extended import get_jwt_identity
-from database import db
+from database import db, insert_unique
 from models.Review import Review
+from models.RatingStats import RatingStats
 from models.Booking import Booking
 from models.RideOffer import RideOffer
 from models.User import User
@@ -10,10 +11,16 @@ from CustomJWTRequired import jwt_noapi_required
 from CustomHttpException import exception_raiser
 from CustomHttpException import CustomHttpException
 from jinja2 import TemplateNotFound
-from blueprints.Rides import get_jwt_user, base_context_from_jwt
+from blueprints.Rides import get_jwt_user, base_context_from_jwt, wants_json
+import Pagination
+from UserCache import load_user
 from sqlalchemy import and_, or_
+from sqlalchemy.orm import contains_eager, joinedload
+import json
 
 reviews = Blueprint("reviews", __name__, url_prefix="/reviews")
+# Rows fetched per round trip when streaming review lists.
+YIELD_PER = 500
 
 
 @reviews.post("/create")
@@ -37,6 +44,7 @@ def create_review():
 
     exception_raiser(not booking_id, "error", "booking_id is required", 400)
     exception_raiser(not rating, "error", "rating is required", 400)
+    exception_raiser(type(rating) is not int, "error", "rating must be a whole number", 400)
     exception_raiser(rating < 1 or rating > 5, "error", "rating must be between 1 and 5", 400)
 
     booking = db.session.get(Booking, booking_id)
@@ -57,25 +65,49 @@ def create_review():
     else:
       reviewed_id = booking.ride.author_id
 
-    # Check if review already exists
-    existing_review = Review.query.filter_by(booking_id=booking_id, reviewer_id=user_id).first()
+    # Create the review; uq_review_booking_reviewer rejects a second one without a SELECT first
+    review = insert_unique(Review, booking_id=booking_id, reviewer_id=user_id, reviewed_id=reviewed_id, rating=rating,
+      comment=comment)
+    exception_raiser(review is None, "error", "You have already reviewed this booking", 400)
 
-    exception_raiser(existing_review, "error", "You have already reviewed this booking", 400)
-
-    # Create the review
-    review = Review(booking_id=booking_id, reviewer_id=user_id, reviewed_id=reviewed_id, rating=rating, comment=comment)
-
-    db.session.add(review)
+    RatingStats.record(reviewed_id, rating)
     db.session.commit()
 
     return jsonify({"message": "Review created successfully", "review": review.to_dict()}), 201
 
   except CustomHttpException as e:
+    db.session.rollback()
     return jsonify({'status': e.status, "message": str(e)}), e.status_code
   except Exception as e:
+    db.session.rollback()
     return jsonify({"error": str(e)}), 500
 
 
+def _stream_reviews(header: dict, query, columns, limit: int | None):
+  """
+  Write {...header, "reviews": [...], "next_cursor": ...} one review at a time, reading rows
+  YIELD_PER at a time, so memory stays flat however many reviews are sent (limit=None: all).
+  """
+  yield json.dumps(header)[:-1] + ', "reviews": ['
+
+  if limit is not None:
+    query = query.limit(limit + 1)
+  result = db.session.execute(query.execution_options(yield_per=YIELD_PER)).scalars()
+
+  sent, last, next_cursor = 0, None, None
+  try:
+    for review in result:
+      if sent == limit:
+        next_cursor = Pagination.row_cursor(last, columns)
+        break
+      yield (", " if sent else "") + json.dumps(review.to_dict())
+      sent, last = sent + 1, review
+  finally:
+    result.close()
+
+  yield '], "next_cursor": ' + json.dumps(next_cursor) + "}"
+
+
 @reviews.get("/user/<int:user_id>")
 @jwt_noapi_required
 def get_user_reviews(user_id):
@@ -86,30 +118,29 @@ def get_user_reviews(user_id):
   try:
     _current_user_id, jwt_map = get_jwt_user()
 
-    user = db.session.get(User, user_id)
+    user = load_user(user_id)
     exception_raiser(not user, "error", "User not found", 404)
 
-    # Get all reviews where this user was reviewed
-    reviews_list = Review.query.filter_by(reviewed_id=user_id).all()
-
-    # Calculate average rating
-    if reviews_list:
-      avg_rating = sum(r.rating for r in reviews_list) / len(reviews_list)
-      total_reviews = len(reviews_list)
-    else:
-      avg_rating = 0
-      total_reviews = 0
-
-    # Check if request wants JSON (API call) or HTML (browser)
-    wants_json = request.args.get('format') == 'json' or request.headers.get('Accept', '').find(
-      'application/json') != -1
-
-    if wants_json:
-      return jsonify({"user_id": user_id, "average_rating": round(avg_rating, 2), "total_reviews": total_reviews,
-        "reviews": [r.to_dict() for r in reviews_list]}), 200
+    avg_rating, total_reviews = RatingStats.summary(user_id)
+    columns = [Review.created_at, Review.id]
+
+    if wants_json():
+      # Reviewers come in the same join; rows are fetched in batches and written out as they arrive.
+      limit = None if request.args.get("limit") == "all" else Pagination.parse_limit(request.args.get("limit"))
+      query = Pagination.keyset_query(
+        db.select(Review).join(Review.reviewer).options(contains_eager(Review.reviewer)).where(Review.reviewed_id == user_id),
+        columns, request.args.get("cursor"), descending=True)
+      header = {"user_id": user_id, "average_rating": round(avg_rating, 2), "total_reviews": total_reviews}
+      return Response(stream_with_context(_stream_reviews(header, query, columns, limit)), mimetype="application/json")
     else:
+      # Reviews received by this user, newest first over ix_reviews_reviewed_created
+      reviews_list, next_cursor = Pagination.paginate(
+        Review.query.filter_by(reviewed_id=user_id)
+        .options(joinedload(Review.reviewer), joinedload(Review.booking).joinedload(Booking.ride)),
+        columns, request.args, descending=True)
       return render_template("reviews/user_reviews.html", reviewed_user=user, reviews=reviews_list,
-        avg_rating=round(avg_rating, 2), total_reviews=total_reviews, **base_context_from_jwt(jwt_map))
+        avg_rating=round(avg_rating, 2), total_reviews=total_reviews, next_cursor=next_cursor,
+        **base_context_from_jwt(jwt_map))
 
   except CustomHttpException as e:
     return jsonify({'status': e.status, "message": str(e)}), e.status_code
@@ -156,6 +187,7 @@ def delete_review(review_id):
     exception_raiser(not review, "error", "Review not found", 404)
     exception_raiser(review.reviewer_id != user_id, "error", "You can only delete your own reviews", 403)
 
+    RatingStats.record(review.reviewed_id, review.rating, -1)
     db.session.delete(review)
     db.session.commit()
 
@@ -174,19 +206,32 @@ def my_reviews():
   try:
     user_id, jwt_map = get_jwt_user()
 
-    reviews_list = Review.query.filter_by(reviewer_id=user_id).all()
+    # One joined statement selecting only what the page shows, newest first over ix_reviews_reviewer_created
+    query = (db.session.query(Review.id, Review.rating, Review.comment, Review.created_at, Review.booking_id,
+        RideOffer.source, RideOffer.destination, User.id.label("reviewed_id"), User.username, User.first_name,
+        User.last_name)
+      .join(Booking, Review.booking_id == Booking.id)
+      .join(RideOffer, Booking.ride_id == RideOffer.id)
+      .join(User, Review.reviewed_id == User.id)
+      .filter(Review.reviewer_id == user_id))
+    rows, next_cursor = Pagination.paginate(query, [Review.created_at, Review.id], request.args, descending=True)
 
     # Format reviews with additional info for template
     formatted_reviews = []
-    for review in reviews_list:
-      formatted_review = {"id": review.id, "rating": review.rating, "comment": review.comment,
-        "created_at": review.created_at.strftime("%Y-%m-%d %H:%M") if review.created_at else "",
-        "booking_info": {"id": review.booking.id, "source": review.booking.ride.source,
-          "destination": review.booking.ride.destination, },
-        "reviewed_user": {"id": review.reviewed.id, "username": review.reviewed.username,
-          "first_name": review.reviewed.first_name, "last_name": review.reviewed.last_name, }}
+    for row in rows:
+      formatted_review = {"id": row.id, "rating": row.rating, "comment": row.comment,
+        "created_at": row.created_at.strftime("%Y-%m-%d %H:%M") if row.created_at else "",
+        "booking_info": {"id": row.booking_id, "source": row.source, "destination": row.destination, },
+        "reviewed_user": {"id": row.reviewed_id, "username": row.username, "first_name": row.first_name,
+          "last_name": row.last_name, }}
       formatted_reviews.append(formatted_review)
 
-    return render_template("reviews/my_reviews.html", reviews=formatted_reviews, **base_context_from_jwt(jwt_map))
+    if wants_json():
+      return jsonify({"status": "success", "content": formatted_reviews, "next_cursor": next_cursor}), 200
+
+    return render_template("reviews/my_reviews.html", reviews=formatted_reviews, next_cursor=next_cursor,
+      **base_context_from_jwt(jwt_map))
+  except CustomHttpException as e:
+    return jsonify({'status': e.status, "message": str(e)}), e.status_code
   except TemplateNotFound:
     abort(404)
@@ -3,7 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from database import db
 from models.enums import UserRole,BookingStatus
 from models.RideOffer import RideOffer
-from models.Review import Review
+from models.RatingStats import RatingStats
 from jinja2 import TemplateNotFound
 from CustomHttpException import CustomHttpException
 from CustomHttpException import exception_raiser
@@ -12,8 +12,13 @@ from flask import Blueprint, render_template, abort, request, jsonify
 from models.User import User
 from models.Booking import Booking
 import FetchCities
+import Pagination
+from SearchCache import RIDE_SEARCH_CACHE, route_key, ride_key
+from ConnectionGraph import CONNECTIONS, Leg
+import ConnectionGraph
 from datetime import date, datetime, time
-from sqlalchemy import and_
+from sqlalchemy import and_, case
+from sqlalchemy.orm import joinedload
 
 
 rides = Blueprint("rides", __name__, url_prefix="/rides")
@@ -39,9 +44,149 @@ def base_context_from_jwt(jwt_map):
     }
 
 
+def wants_json() -> bool:
+    """
+    JSON variant of an HTML page: ?format=json or an Accept header asking for JSON.
+    """
+    return request.args.get("format") == "json" or "application/json" in request.headers.get("Accept", "")
+
+
 def format_ts(ts: int) -> str:
     return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
 
+def day_bounds(day: str) -> tuple[int, int]:
+    dt = datetime.strptime(day, "%Y-%m-%d")
+    sod = int(datetime.combine(dt, time.min).timestamp())
+    eod = int(datetime.combine(dt, time.max).timestamp())
+    return sod, eod
+
+def route_query(from_city, to_city, start: int, end: int | None = None):
+    """
+    Active rides on a route departing inside [start, end], shaped to hit ix_ride_offers_active_route_departure.
+    from_city/to_city are a city name or a collection of names (radius searches).
+    """
+    query = (
+        RideOffer.query
+        .options(joinedload(RideOffer.author))
+        .filter(RideOffer.active == db.true())
+        .filter(_city_filter(RideOffer.source, from_city), _city_filter(RideOffer.destination, to_city))
+        .filter(RideOffer.departure_date >= start)
+    )
+
+    if end is not None:
+        query = query.filter(RideOffer.departure_date <= end)
+
+    return query
+
+def ride_leg(ride: RideOffer) -> Leg:
+    return Leg(
+        ride_id=ride.id,
+        source=ride.source,
+        destination=ride.destination,
+        departure=ride.departure_date,
+        arrival=ride.departure_date + FetchCities.travel_seconds(ride.source, ride.destination),
+        seats=ride.available_seats,
+    )
+
+def load_connections():
+    """
+    Seed the connection graph with every upcoming active ride (called once at startup).
+    """
+    now = int(datetime.now().timestamp())
+    for ride in RideOffer.query.filter(RideOffer.active == db.true(), RideOffer.departure_date > now):
+        CONNECTIONS.add(ride_leg(ride))
+
+def find_connection(from_city: str, to_city: str, depart_after: int, seats: int = 1,
+                    min_transfer: int = ConnectionGraph.DEFAULT_MIN_TRANSFER,
+                    max_legs: int = ConnectionGraph.DEFAULT_MAX_LEGS) -> list[dict] | None:
+    """
+    Earliest-arriving multi-leg journey as display-ready dicts, or None.
+    """
+    journey = CONNECTIONS.earliest_arrival(from_city, to_city, depart_after, min_transfer, max_legs, seats)
+    if not journey:
+        return None
+
+    prices = dict(
+        db.session.query(RideOffer.id, RideOffer.price)
+        .filter(RideOffer.id.in_([leg.ride_id for leg in journey]))
+        .all()
+    )
+    return [
+        {
+            **leg.to_dict(),
+            "price": prices.get(leg.ride_id),
+            "departure_display": format_ts(leg.departure),
+            "arrival_display": format_ts(leg.arrival),
+        }
+        for leg in journey
+    ]
+
+def _city_filter(column, cities):
+    if isinstance(cities, str):
+        return column == cities
+    return column.in_(list(cities))
+
+def radius_endpoints(from_city: str, to_city: str, radius_km: float | None):
+    """
+    Departure/arrival candidates of a search, mapped to their distance from the requested cities.
+    Without a radius only the exact cities are returned.
+    """
+    if not radius_km or radius_km <= 0:
+        return {from_city: 0.0}, {to_city: 0.0}
+
+    radius_km = min(radius_km, MAX_SEARCH_RADIUS_KM)
+    return (
+        FetchCities.nearby(from_city, 'Romania', radius_km),
+        FetchCities.nearby(to_city, 'Romania', radius_km),
+    )
+
+def booked_ride_ids(user_id: int, ride_ids) -> set[int]:
+    ride_ids = list(ride_ids)
+    if not ride_ids:
+        return set()
+
+    return {
+        ride_id
+        for (ride_id,) in db.session.query(Booking.ride_id).filter(
+            Booking.passenger_id == user_id,
+            Booking.ride_id.in_(ride_ids),
+            Booking.status.in_([BookingStatus.PENDING, BookingStatus.ACCEPTED])
+        )
+    }
+
+MAX_SEARCH_RADIUS_KM = 100
+
+def ride_snapshots(rides_found, sources=None, destinations=None) -> list[tuple]:
+    """
+    Plain (ride, departure display, avg rating, review count) tuples for the results page.
+    They hold no ORM state, so they can be cached and shared between requests.
+    """
+    ratings = RatingStats.summaries(r.author_id for r in rides_found)
+
+    snapshots = []
+    for r in rides_found:
+        avg_rating, total_reviews = ratings.get(r.author_id, (0, 0))
+        ride = {**r.to_dict(), "author": {"first_name": r.author.first_name, "last_name": r.author.last_name}}
+        if sources is not None:
+            ride["detour_km"] = round(sources[r.source] + destinations[r.destination], 1)
+        snapshots.append((ride, format_ts(r.departure_date), round(avg_rating, 2), total_reviews))
+
+    return snapshots
+
+def detour_column(sources: dict, destinations: dict):
+    """
+    SQL expression of a ride's detour: distance of its source and destination from the requested cities.
+    """
+    return (case(sources, value=RideOffer.source, else_=0.0)
+            + case(destinations, value=RideOffer.destination, else_=0.0))
+
+SEARCH_SORTS = {
+    "departure": ((RideOffer.departure_date, RideOffer.id), False),
+    "departure_desc": ((RideOffer.departure_date, RideOffer.id), True),
+    "price": ((RideOffer.price, RideOffer.departure_date, RideOffer.id), False),
+    "price_desc": ((RideOffer.price, RideOffer.departure_date, RideOffer.id), True),
+}
+
 @rides.post("/create")
 @jwt_noapi_required
 def create_ride():
@@ -68,7 +213,11 @@ def create_ride():
     ride: RideOffer = RideOffer(**request.get_json())
     ride.author_id = user_id
     db.session.add(ride)
+    cache_key = ride_key(ride)
     db.session.commit()
+    RIDE_SEARCH_CACHE.invalidate(cache_key)
+    CONNECTIONS.add(ride_leg(ride))
+    FetchCities.index_places([ride.source, ride.destination], 'Romania')
     return jsonify({"status": "success", "message": "Ride added with success", "content": ride.to_dict()}), 201
 
   except CustomHttpException as e:
@@ -90,12 +239,10 @@ def create_ride_form():
         # Redirect non-drivers
         exception_raiser(user_role != UserRole.DRIVER, "error", "You must be a driver to access this page.", 403)
         
-        cities = FetchCities.get_all('romania')
         today = date.today().isoformat()
     
         return render_template(
             "rides/create.html",
-            cities=cities,
             today=today,
             **base_context_from_jwt(jwt_map)
         )
@@ -113,32 +260,39 @@ def create_ride_form():
 @rides.get("/all_rides")
 @jwt_noapi_required
 def show_all_created_rides():
-    user_id, jwt_map = get_jwt_user(require_driver=True)
+    try:
+        user_id, jwt_map = get_jwt_user(require_driver=True)
 
-    rides_found = (
-        RideOffer.query
-        .filter(RideOffer.author_id == user_id)
-        .order_by(RideOffer.departure_date.asc())
-        .all()
-    )
+        # Oldest first like before, one page at a time over ix_ride_offers_author_departure.
+        rides_found, next_cursor = Pagination.paginate(
+            RideOffer.query.filter(RideOffer.author_id == user_id),
+            [RideOffer.departure_date, RideOffer.id], request.args
+        )
 
-    rides_data = [
-        {
-            "id": r.id,
-            "source": r.source,
-            "destination": r.destination,
-            "available_seats": r.available_seats,
-            "price": r.price,
-            "departure_date": format_ts(r.departure_date),
-        }
-        for r in rides_found
-    ]
+        if wants_json():
+            return jsonify({"status": "success", "content": [r.to_dict() for r in rides_found],
+                            "next_cursor": next_cursor}), 200
+
+        rides_data = [
+            {
+                "id": r.id,
+                "source": r.source,
+                "destination": r.destination,
+                "available_seats": r.available_seats,
+                "price": r.price,
+                "departure_date": format_ts(r.departure_date),
+            }
+            for r in rides_found
+        ]
 
-    return render_template(
-        "rides/all_rides.html",
-        rides=rides_data,
-        **base_context_from_jwt(jwt_map)
-    )
+        return render_template(
+            "rides/all_rides.html",
+            rides=rides_data,
+            next_cursor=next_cursor,
+            **base_context_from_jwt(jwt_map)
+        )
+    except CustomHttpException as e:
+        return jsonify({"status": e.status, "message": str(e)}), e.status_code
 
 
 @rides.get("/<int:ride_id>")
@@ -160,8 +314,11 @@ def cancel_ride(ride_id):
     exception_raiser(not ride, "error", "Ride not found", 404)
     exception_raiser(ride.author_id != user_id, "error", "Not your ride", 403)
 
+    cache_key = ride_key(ride)
     db.session.delete(ride)
     db.session.commit()
+    RIDE_SEARCH_CACHE.invalidate(cache_key)
+    CONNECTIONS.remove(ride_id)
 
     return jsonify({
         "status": "success",
@@ -173,9 +330,8 @@ def cancel_ride(ride_id):
 @jwt_noapi_required
 def search_rides():
     try:
-        cities = FetchCities.get_all('romania')
         today = date.today().isoformat()
-        return render_template('rides/search.html', cities = cities, today = today)
+        return render_template('rides/search.html', today = today)
     except TemplateNotFound:
         abort(404)
     except Exception as e:
@@ -186,6 +342,144 @@ def search_rides():
         raise
 
 
+@rides.get("/api/search")
+@jwt_required()
+def search_rides_api():
+    """
+    JSON ride search for mobile clients and partner integrations.
+
+    Query parameters:
+        from_city, to_city: required.
+        date: "YYYY-MM-DD", optional. Without it every upcoming ride is searched.
+        min_price, max_price, min_seats: optional filters.
+        radius_km: optional, also match rides starting/ending this close to the cities (max 100).
+        sort: detour (default with radius_km) | departure (default otherwise) | departure_desc | price | price_desc
+        limit: page size (max 100), cursor: value of next_cursor from the previous page.
+    Returns:
+        - 200, {"status", "content": [rides], "next_cursor"}
+        - 400, if a parameter or the cursor is invalid
+    """
+    try:
+        user_id, _jwt_map = get_jwt_user()
+        args = request.args
+
+        from_city = args.get("from_city")
+        to_city = args.get("to_city")
+        exception_raiser(not from_city or not to_city, "error", "from_city and to_city are required", 400)
+        radius_km = args.get("radius_km", type=float)
+        sort = args.get("sort", "detour" if radius_km and radius_km > 0 else "departure")
+        exception_raiser(sort not in SEARCH_SORTS and sort != "detour", "error", "Unknown sort", 400)
+
+        if args.get("date"):
+            try:
+                start, end = day_bounds(args["date"])
+            except ValueError:
+                raise CustomHttpException("error", "date must be YYYY-MM-DD", 400)
+        else:
+            start, end = int(datetime.now().timestamp()), None
+
+        sources, destinations = radius_endpoints(from_city, to_city, radius_km)
+        query = route_query(sources, destinations, start, end)
+        min_price = args.get("min_price", type=int)
+        max_price = args.get("max_price", type=int)
+        min_seats = args.get("min_seats", type=int)
+
+        if min_price is not None:
+            query = query.filter(RideOffer.price >= min_price)
+        if max_price is not None:
+            query = query.filter(RideOffer.price <= max_price)
+        if min_seats is not None:
+            query = query.filter(RideOffer.available_seats >= min_seats)
+
+        detour = lambda r: sources[r.source] + destinations[r.destination]
+        if sort == "detour":
+            # Ranked in SQL, so a page boundary never splits the ordering.
+            columns, descending = (detour_column(sources, destinations), RideOffer.departure_date, RideOffer.id), False
+            key = lambda r: [detour(r), r.departure_date, r.id]
+        else:
+            (columns, descending), key = SEARCH_SORTS[sort], None
+        page, next_cursor = Pagination.keyset_page(
+            query, columns, args.get("cursor"), Pagination.parse_limit(args.get("limit")), descending, key
+        )
+
+        booked_ids = booked_ride_ids(user_id, (r.id for r in page))
+        ratings = RatingStats.summaries(r.author_id for r in page)
+        content = []
+        for r in page:
+            avg_rating, total_reviews = ratings.get(r.author_id, (0, 0))
+            content.append({
+                **r.to_dict(),
+                "driver": {"first_name": r.author.first_name, "last_name": r.author.last_name},
+                "driver_avg_rating": avg_rating,
+                "driver_total_reviews": total_reviews,
+                "already_booked": r.id in booked_ids,
+                "detour_km": round(detour(r), 1),
+            })
+
+        return jsonify({"status": "success", "content": content, "next_cursor": next_cursor}), 200
+    except CustomHttpException as e:
+        return jsonify({"status": e.status, "message": str(e)}), e.status_code
+
+
+@rides.get("/api/connections")
+@jwt_required()
+def search_connections_api():
+    """
+    Multi-leg connection search over upcoming rides.
+
+    Query parameters:
+        from_city, to_city: required.
+        date: "YYYY-MM-DD", optional. Without it the journey may start right away.
+        seats: seats needed on every leg (default 1).
+        min_transfer: minutes between arriving and the next departure (default 15).
+        max_legs: 1 to 4 (default 3).
+    Returns:
+        - 200, {"status", "content": [legs] or null}
+        - 400, if a parameter is invalid
+    """
+    try:
+        get_jwt_user()
+        args = request.args
+
+        from_city = args.get("from_city")
+        to_city = args.get("to_city")
+        exception_raiser(not from_city or not to_city, "error", "from_city and to_city are required", 400)
+        exception_raiser(from_city == to_city, "error", "Cities must be different", 400)
+
+        seats = args.get("seats", 1, type=int)
+        min_transfer = args.get("min_transfer", ConnectionGraph.DEFAULT_MIN_TRANSFER // 60, type=int)
+        max_legs = args.get("max_legs", ConnectionGraph.DEFAULT_MAX_LEGS, type=int)
+        exception_raiser(seats < 1 or min_transfer < 0 or not 1 <= max_legs <= 4, "error", "Invalid parameters", 400)
+
+        now = int(datetime.now().timestamp())
+        if args.get("date"):
+            try:
+                depart_after = max(day_bounds(args["date"])[0], now)
+            except ValueError:
+                raise CustomHttpException("error", "date must be YYYY-MM-DD", 400)
+        else:
+            depart_after = now
+
+        legs = find_connection(from_city, to_city, depart_after, seats, min_transfer * 60, max_legs)
+        return jsonify({"status": "success", "content": legs}), 200
+    except CustomHttpException as e:
+        return jsonify({"status": e.status, "message": str(e)}), e.status_code
+
+
+@rides.get("/search/cache")
+@jwt_required()
+def search_cache_stats():
+    """
+    Hit/miss counters of the ride search cache (admin only), used to size it.
+    """
+    try:
+        _user_id, jwt_map = get_jwt_user()
+        exception_raiser(jwt_map.get("role") != UserRole.ADMIN, "error", "Admin only", 403)
+        return jsonify({"status": "success", "content": RIDE_SEARCH_CACHE.stats()}), 200
+    except CustomHttpException as e:
+        return jsonify({"status": e.status, "message": str(e)}), e.status_code
+
+
 @rides.post("/search")
 @jwt_noapi_required
 def search_rides_results():
@@ -199,61 +493,42 @@ def search_rides_results():
         if not from_city or not to_city or not search_date:
             return redirect("/rides", code=303)
 
-        dt = datetime.strptime(search_date, "%Y-%m-%d")
-        sod = int(datetime.combine(dt, time.min).timestamp())
-        eod = int(datetime.combine(dt, time.max).timestamp())
+        radius_km = request.form.get("radius", type=float)
+        if radius_km:
+            # Radius searches span many routes, so they bypass the per-route cache and are ranked by detour.
+            sources, destinations = radius_endpoints(from_city, to_city, radius_km)
+            sod, eod = day_bounds(search_date)
+            rides_found = (route_query(sources, destinations, sod, eod)
+                           .order_by(detour_column(sources, destinations), RideOffer.departure_date).all())
+            snapshots = ride_snapshots(rides_found, sources, destinations)
+        else:
+            # Route/day results are shared by every passenger; only the "already booked" flag is per user.
+            cache_key = route_key(from_city, to_city, search_date)
+            snapshots, generation = RIDE_SEARCH_CACHE.get(cache_key)
+            if snapshots is None:
+                sod, eod = day_bounds(search_date)
+                snapshots = ride_snapshots(route_query(from_city, to_city, sod, eod).all())
+                RIDE_SEARCH_CACHE.put(cache_key, snapshots, generation)
+
+        booked_ids = booked_ride_ids(user_id, (ride["id"] for ride, *_ in snapshots))
+        results = [
+            (ride, ride_date, ride["id"] in booked_ids, avg_rating, total_reviews)
+            for ride, ride_date, avg_rating, total_reviews in snapshots
+        ]
+
+        connection = None
+        if not results:
+            sod, _eod = day_bounds(search_date)
+            connection = find_connection(from_city, to_city, max(sod, int(datetime.now().timestamp())))
+
+        # Never geocode inside the request: an unknown city is resolved in the background instead.
+        distance_km = FetchCities.cached_distance(from_city, to_city, 'Romania')
 
-        rides_found = (
-            RideOffer.query
-            .filter_by(source=from_city, destination=to_city)
-            .filter(and_(sod <= RideOffer.departure_date,
-                         RideOffer.departure_date <= eod))
-            .all()
-        )
-
-        ride_ids = [r.id for r in rides_found]
-        booked_ids = set()
-
-        if ride_ids:
-            booked_ids = {
-                b.ride_id
-                for b in Booking.query.filter(
-                    Booking.passenger_id == user_id,
-                    Booking.ride_id.in_(ride_ids),
-                    Booking.status.in_([BookingStatus.PENDING, BookingStatus.ACCEPTED])
-                ).all()
-            }
-
-        # Calculate driver ratings for each ride
-        results = []
-        for r in rides_found:
-            # Get driver's reviews
-            driver_reviews = Review.query.filter_by(reviewed_id=r.author_id).all()
-            if driver_reviews:
-                avg_rating = sum(rev.rating for rev in driver_reviews) / len(driver_reviews)
-                total_reviews = len(driver_reviews)
-            else:
-                avg_rating = 0
-                total_reviews = 0
-            
-            results.append(
-                (
-                    r,
-                    datetime.fromtimestamp(r.departure_date).strftime("%Y-%m-%d %H:%M"),
-                    r.id in booked_ids,
-                    round(avg_rating, 2),
-                    total_reviews
-                )
-            )
-
-        distance_km = FetchCities.distance(
-            FetchCities.get_location(from_city, 'Romania'),
-            FetchCities.get_location(to_city, 'Romania')
-        )
-        
         return render_template(
             "rides/results.html",
             rides=results,
+            connection=connection,
+            distance_km=distance_km,
             from_city=from_city,
             to_city=to_city,
             date=search_date,
@@ -8,11 +8,15 @@ import re
 
 from models.User import User
 from models.Review import Review
+from models.RatingStats import RatingStats
 from blueprints.userAccess import is_password_strong
 from CustomHttpException import CustomHttpException
 from CustomHttpException import exception_raiser
 from CustomJWTRequired import jwt_noapi_required
 from database import db
+from UserCache import USER_CACHE, current_user, invalidate_user
+from blueprints.Rides import get_jwt_user
+from models.enums import UserRole
 from flask_jwt_extended import (
     create_access_token, get_jwt_identity,
     jwt_required, verify_jwt_in_request,
@@ -43,10 +47,9 @@ def profile():
     """
     User profile page and update functionality.
     """
-    user_id = get_jwt_identity()
-    user: User = User.query.get(int(user_id))
-    
     if request.method == "POST":
+        # Writes go through the ORM row; the cached copy has no password hash.
+        user: User = db.session.get(User, int(get_jwt_identity()))
         try:
             data = request.form
             
@@ -123,6 +126,7 @@ def profile():
             exception_raiser(existing_user is not None, "error", "Email already exists.", 400)
             
             db.session.commit()
+            invalidate_user(user.id)
             token = create_access_token(identity=user.get_identity(), additional_claims=user.get_additional_claims(), expires_delta=timedelta(days=1))
             response = make_response(render_template('profile.html', 
                                  user=user, 
@@ -144,15 +148,10 @@ def profile():
                                  user=user, 
                                  message="An error occurred while updating profile",
                                  message_type="error")
-    
+
+    user = current_user()
     reviews_list = Review.query.filter_by(reviewed_id=user.id).all()
-    
-    if reviews_list:
-        avg_rating = sum(r.rating for r in reviews_list) / len(reviews_list)
-        total_reviews = len(reviews_list)
-    else:
-        avg_rating = 0
-        total_reviews = 0
+    avg_rating, total_reviews = RatingStats.summary(user.id)
     
     # Show profile form
     try:
@@ -163,3 +162,17 @@ def profile():
                              total_reviews=total_reviews)
     except TemplateNotFound:
         abort(404)
+
+
+@user_profile.get("/profile/cache")
+@jwt_required()
+def user_cache_stats():
+    """
+    Hit/miss counters of the user cache (admin only), including how many database lookups it saved.
+    """
+    try:
+        _user_id, jwt_map = get_jwt_user()
+        exception_raiser(jwt_map.get("role") != UserRole.ADMIN, "error", "Admin only", 403)
+        return jsonify({"status": "success", "content": USER_CACHE.stats()}), 200
+    except CustomHttpException as e:
+        return jsonify({"status": e.status, "message": str(e)}), e.status_code
@@ -16,7 +16,7 @@ from models.User import User
 from CustomHttpException import CustomHttpException
 from CustomHttpException import exception_raiser
 from CustomJWTRequired import jwt_noapi_required
-from database import db
+from database import db, insert_unique
 from flask_jwt_extended import (
     create_access_token, get_jwt,
     jwt_required, verify_jwt_in_request,
@@ -138,16 +138,17 @@ def register():
     data["password"] = hashlib.sha256(data["password"].encode()).hexdigest()
     user: User = User(**data)
     exception_raiser(not is_email_valid(user.email), "error", "Invalid email.", 400)
-    ures, ucont = user_exists(user.email, user.username)
-    if ures:
+
+    # Insert first: the unique username/email columns decide. Only a rejected insert pays for
+    # the lookup that tells the client which of the two is taken.
+    if insert_unique(User, **{**data, "role": UserRole.DEFAULT}) is None:
+        _ures, ucont = user_exists(user.email, user.username)
         return jsonify({
             'status': 'error',
             'message': 'User already exists.',
             'content': ucont
         }), 400
 
-    user.role = UserRole.DEFAULT
-    db.session.add(user)
     db.session.commit()
     return jsonify({"status": "success", "message": "User registered"}), 201
   except CustomHttpException as e:
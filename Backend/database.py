@@ -1,3 +1,44 @@
+from datetime import datetime
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+db = SQLAlchemy()
+
+# Given to rows whose creation time was never recorded, so they sort as the oldest.
+LEGACY_TIMESTAMP = datetime(1970, 1, 1)
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING; anything else takes the savepoint path.
+ON_CONFLICT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def insert_unique(model, **values):
+    '''
+        Insert one row and return it as an ORM object, or None when a unique constraint already
+        holds an equal row. One round trip instead of SELECT-then-INSERT, and no race between the
+        two. The caller commits.
+    '''
+    insert = ON_CONFLICT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if insert is not None:
+        return db.session.scalars(
+            insert(model).values(**values).on_conflict_do_nothing().returning(model)
+        ).first()
+
+    try:
+        with db.session.begin_nested():
+            row = model(**values)
+            db.session.add(row)
+        return row
+    except IntegrityError:
+        return None
 
-db = SQLAlchemy()
\ No newline at end of file
+def backfill_not_null(column, value):
+    '''
+        Fill the NULLs of a column that was later declared NOT NULL, then add the constraint on
+        PostgreSQL (create_all never alters a table that already exists). Commits.
+    '''
+    table = column.table
+    db.session.execute(db.update(table).where(column.is_(None)).values({column.name: value}))
+    if db.session.get_bind().dialect.name == "postgresql":
+        db.session.execute(db.text(f'ALTER TABLE {table.name} ALTER COLUMN {column.name} SET NOT NULL'))
+    db.session.commit()
@@ -11,15 +11,18 @@ class Booking(db.Model):
             "passenger_id",
             name="uq_booking_ride_passenger"
         ),
+        # A passenger's booking history, keyset-paginated by (created_at, id).
+        db.Index("ix_booking_passenger_created", "passenger_id", "created_at", "id"),
     )
 
     id = db.Column(db.Integer, primary_key=True)
     ride_id = db.Column(db.Integer, db.ForeignKey("ride_offers.id"), nullable=False, index=True)
-    passenger_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    passenger_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     status = db.Column(db.String(16), nullable=False, default=BookingStatus.PENDING, index=True)
 
     created_at = db.Column(
         db.DateTime,
+        nullable=False,
         default=datetime.utcnow
     )
 
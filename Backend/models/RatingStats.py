@@ -0,0 +1,135 @@
+from sqlalchemy.exc import IntegrityError
+
+import database
+from database import db
+
+STAR_COLUMNS = ("stars_1", "stars_2", "stars_3", "stars_4", "stars_5")
+
+class RatingStats(db.Model):
+    """
+    Denormalized rating summary of a user, kept in step with the reviews table.
+    Written in the same transaction as every review insert/delete so reads never touch `reviews`.
+    """
+    __tablename__ = "rating_stats"
+
+    user_id: int = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    review_count: int = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum: int = db.Column(db.Integer, nullable=False, default=0)
+    stars_1: int = db.Column(db.Integer, nullable=False, default=0)
+    stars_2: int = db.Column(db.Integer, nullable=False, default=0)
+    stars_3: int = db.Column(db.Integer, nullable=False, default=0)
+    stars_4: int = db.Column(db.Integer, nullable=False, default=0)
+    stars_5: int = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def average(self) -> float:
+        if not self.review_count:
+            return 0
+        return round(self.rating_sum / self.review_count, 2)
+
+    @property
+    def histogram(self) -> list[int]:
+        return [getattr(self, column) or 0 for column in STAR_COLUMNS]
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "average_rating": self.average,
+            "total_reviews": self.review_count,
+            "histogram": self.histogram,
+        }
+
+    def __repr__(self):
+        return f"<RatingStats user_id={self.user_id} count={self.review_count} sum={self.rating_sum}>"
+
+    @staticmethod
+    def summary(user_id: int) -> tuple[float, int]:
+        """
+        (average, count) for a single user, 0 for users that were never reviewed.
+        """
+        stats = db.session.get(RatingStats, user_id)
+        if stats is None:
+            return 0, 0
+        return stats.average, stats.review_count
+
+    @staticmethod
+    def summaries(user_ids) -> dict[int, tuple[float, int]]:
+        """
+        (average, count) for every reviewed user in user_ids, loaded with one primary key lookup.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return {}
+
+        rows = RatingStats.query.filter(RatingStats.user_id.in_(user_ids)).all()
+        return {stats.user_id: (stats.average, stats.review_count) for stats in rows}
+
+    @staticmethod
+    def record(user_id: int, rating: int, delta: int = 1):
+        """
+        Add (delta=1) or remove (delta=-1) one rating of the given user.
+        Adds run as one INSERT ... ON CONFLICT DO UPDATE and removals as an in-place UPDATE, so
+        concurrent reviews never lose increments, even of a user without a stats row yet.
+        The caller commits.
+        """
+        star = STAR_COLUMNS[rating - 1]
+        increments = {"review_count": delta, "rating_sum": delta * rating, star: delta}
+
+        insert = database.ON_CONFLICT_DIALECTS.get(db.session.get_bind().dialect.name)
+        if delta > 0 and insert is not None:
+            statement = insert(RatingStats).values(
+                user_id=user_id, **{**{column: 0 for column in STAR_COLUMNS}, **increments})
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=[RatingStats.user_id],
+                set_={column: getattr(RatingStats, column) + getattr(statement.excluded, column)
+                      for column in increments},
+            ))
+            return
+
+        if RatingStats._increment(user_id, increments) or delta < 0:
+            return
+        try:
+            # Another transaction may create the row between our UPDATE and INSERT.
+            with db.session.begin_nested():
+                db.session.add(RatingStats(user_id=user_id, **{**{column: 0 for column in STAR_COLUMNS},
+                                                               **increments}))
+        except IntegrityError:
+            RatingStats._increment(user_id, increments)
+
+    @staticmethod
+    def _increment(user_id: int, increments: dict[str, int]) -> bool:
+        result = db.session.execute(
+            db.update(RatingStats)
+            .where(RatingStats.user_id == user_id)
+            .values({getattr(RatingStats, column): getattr(RatingStats, column) + value
+                     for column, value in increments.items()})
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Recompute every summary from the reviews table and fix any drift.
+        Returns the number of users whose stats were written.
+        """
+        from models.Review import Review
+
+        rows = (
+            db.session.query(Review.reviewed_id, Review.rating, db.func.count(Review.id))
+            .group_by(Review.reviewed_id, Review.rating)
+            .all()
+        )
+
+        fresh: dict[int, RatingStats] = {}
+        for user_id, rating, total in rows:
+            stats = fresh.setdefault(user_id, RatingStats(user_id=user_id, review_count=0, rating_sum=0,
+                                                          **{column: 0 for column in STAR_COLUMNS}))
+            stats.review_count += total
+            stats.rating_sum += rating * total
+            setattr(stats, STAR_COLUMNS[rating - 1], getattr(stats, STAR_COLUMNS[rating - 1]) + total)
+
+        RatingStats.query.delete()
+        db.session.add_all(fresh.values())
+        db.session.commit()
+        return len(fresh)
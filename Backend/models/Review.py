@@ -5,16 +5,21 @@ from database import db
 class Review(db.Model):
   __tablename__ = "reviews"
 
-  __table_args__ = (db.UniqueConstraint("booking_id", "reviewer_id", name="uq_review_booking_reviewer"),)
+  __table_args__ = (
+    db.UniqueConstraint("booking_id", "reviewer_id", name="uq_review_booking_reviewer"),
+    # Reviews written / received, keyset-paginated by (created_at, id).
+    db.Index("ix_reviews_reviewer_created", "reviewer_id", "created_at", "id"),
+    db.Index("ix_reviews_reviewed_created", "reviewed_id", "created_at", "id"),
+  )
 
   id = db.Column(db.Integer, primary_key=True)
   booking_id = db.Column(db.Integer, db.ForeignKey("booking.id"), nullable=False, index=True)
-  reviewer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
-  reviewed_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+  reviewer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+  reviewed_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
   rating = db.Column(db.Integer, nullable=False)  # 1-5 stars
   comment = db.Column(db.Text, nullable=True)
 
-  created_at = db.Column(db.DateTime, default=datetime.utcnow)
+  created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
   # Relationships
   booking = db.relationship("Booking", backref="reviews", lazy=True)
@@ -30,3 +35,4 @@ class Review(db.Model):
 
   def __repr__(self):
     return f"<Review id={self.id} booking_id={self.booking_id} rating={self.rating}>"
+
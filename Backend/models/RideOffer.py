@@ -9,13 +9,32 @@ ride_passengers = db.Table(
 
 class RideOffer(db.Model):
     __tablename__ = "ride_offers"
+
+    __table_args__ = (
+        # Partial indexes over bookable rides only, so they stay small as history grows.
+        # Route searches: equality on both cities, range scan + keyset ordering on departure.
+        db.Index(
+            "ix_ride_offers_active_route_departure", "source", "destination", "departure_date", "id",
+            postgresql_where=db.text("active"),
+            sqlite_where=db.text("active = 1"),
+        ),
+        # A driver's ride history, keyset-paginated by (departure_date, id).
+        db.Index("ix_ride_offers_author_departure", "author_id", "departure_date", "id"),
+        # ExpirySweeper: oldest active rides first.
+        db.Index(
+            "ix_ride_offers_active_departure", "departure_date",
+            postgresql_where=db.text("active"),
+            sqlite_where=db.text("active = 1"),
+        ),
+    )
+
     id: int = db.Column(db.Integer, primary_key=True)
     author_id: int = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     source: str = db.Column(db.String(120), nullable=False)
     destination: str = db.Column(db.String(120), nullable=False)
     departure_date: int = db.Column(db.Integer, nullable=False)
     ## Left for the UI to be able to grey out the expired rides whenever a driver/passenger looks at the history.
-    ## To get all active rides you should filter after departure_date - 3600 > now.
+    ## ExpirySweeper flips it to False once departure_date - 3600 <= now, so filter on active instead.
     active: bool = db.Column(db.Boolean, default=True, nullable=False)
     price: int = db.Column(db.Integer, nullable=False)
     available_seats: int = db.Column(db.Integer, nullable=False)
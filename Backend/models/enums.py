@@ -9,3 +9,4 @@ class BookingStatus(str, Enum):
     PENDING = "pending"
     ACCEPTED = "accepted"
     DENIED = "denied"
+    EXPIRED = "expired"
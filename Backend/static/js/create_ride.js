@@ -21,58 +21,59 @@ burger.addEventListener("click", () => {
 overlay.addEventListener("click", closeSidebar);
 
 // City Autocomplete
-let cityList = [];
+let suggestTimer = null;
 
-async function loadCities(country) {
+async function fetchCities(country, query) {
     try {
-        const response = await fetch(`/cities/${country}`);
+        const response = await fetch(`/cities/${country}/autocomplete?q=${encodeURIComponent(query)}&limit=7`);
         if (!response.ok)
             throw new Error();
 
         const json = await response.json();
-        cityList = json['content'];
+        return json['content'];
     } catch {
         console.log('Cities are missing.');
+        return [];
     }
 }
 
-loadCities('romania');
-
 function setupAutocomplete(inputId, resultsId) {
     const results = document.getElementById(resultsId);
     const input = document.getElementById(inputId);
 
     input.addEventListener("input", () => {
-        const query = input.value.trim().toLowerCase();
-        results.innerHTML = "";
+        const query = input.value.trim();
+        clearTimeout(suggestTimer);
 
         if (query.length === 0) {
+            results.innerHTML = "";
             results.classList.add("hidden");
             return;
         }
 
-        const matches = cityList.filter(city =>
-            city.toLowerCase().startsWith(query)
-        ).slice(0, 7);
+        suggestTimer = setTimeout(async () => {
+            const matches = await fetchCities('romania', query);
+            results.innerHTML = "";
 
-        if (matches.length === 0) {
-            results.classList.add("hidden");
-            return;
-        }
-
-        matches.forEach(city => {
-            const li = document.createElement("li");
-            li.textContent = city;
-            li.className = "px-3 py-2 hover:bg-gray-100 cursor-pointer";
-            li.addEventListener("click", () => {
-                input.value = city;
+            if (matches.length === 0 || input.value.trim() !== query) {
                 results.classList.add("hidden");
+                return;
+            }
+
+            matches.forEach(city => {
+                const li = document.createElement("li");
+                li.textContent = city;
+                li.className = "px-3 py-2 hover:bg-gray-100 cursor-pointer";
+                li.addEventListener("click", () => {
+                    input.value = city;
+                    results.classList.add("hidden");
+                });
+
+                results.appendChild(li);
             });
-            
-            results.appendChild(li);
-        });
 
-        results.classList.remove("hidden");
+            results.classList.remove("hidden");
+        }, 120);
     });
 
     document.addEventListener("click", (e) => {
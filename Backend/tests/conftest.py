@@ -11,14 +11,31 @@ from blueprints.userAccess import user_access
 from blueprints.DriverAccess import driver_access
 from blueprints.Bookings import bookings
 from blueprints.Rides import rides
+from blueprints.Reviews import reviews
+from blueprints.Cities import cities
+from blueprints.UserProfile import user_profile
 from database import db
 from models.User import User
+from SearchCache import RIDE_SEARCH_CACHE
+from UserCache import USER_CACHE
+from GeoIndex import GeoGrid
+from Gazetteer import Gazetteer
+from GeocodeCache import GeocodeCache
+from GeocodePool import GeocodePool
+from CityCatalogue import CityCatalogue
+from ConnectionGraph import CONNECTIONS
+import FetchCities
 
 @pytest.fixture()
-def mock_app():
+def database_uri():
+    """Overridden by tests that need a database shared between threads."""
+    return "sqlite:///:memory:"
+
+@pytest.fixture()
+def mock_app(database_uri):
     app = Flask(__name__)
     app.config["TESTING"] = True
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["JWT_SECRET_KEY"] = "test_secret"
     jwt = JWTManager(app)
@@ -28,6 +45,9 @@ def mock_app():
     app.register_blueprint(driver_access)
     app.register_blueprint(bookings)
     app.register_blueprint(rides)
+    app.register_blueprint(reviews)
+    app.register_blueprint(cities)
+    app.register_blueprint(user_profile)
 
     # Create and tear down database per test session
     with app.app_context():
@@ -55,6 +75,9 @@ def mock_app():
         db.session.commit()
 
         yield app
+        RIDE_SEARCH_CACHE.clear()
+        USER_CACHE.clear()
+        CONNECTIONS.clear()
         db.session.remove()
         db.drop_all()
 
@@ -76,4 +99,46 @@ def auth_headers(mock_app, user):
         token = create_access_token(identity=str(user.id))  # ✅ STRING
         return {
             "Authorization": f"Bearer {token}"
-        }
\ No newline at end of file
+        }
+
+@pytest.fixture()
+def query_counter(mock_app):
+    """Collects every SQL statement executed against the test engine."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with mock_app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+TEST_LOCATIONS = {
+    "Iasi": (47.1585, 27.6014),
+    "Podu Iloaiei": (47.2167, 27.2667),
+    "Cluj": (46.7712, 23.6236),
+    "Floresti": (46.7475, 23.4908),
+    "Bucuresti": (44.4268, 26.1025),
+}
+
+
+def _offline_fetch(country):
+    raise ConnectionError(f"offline: no city list for {country}")
+
+
+@pytest.fixture(autouse=True)
+def offline_geocoding(monkeypatch, tmp_path):
+    """Keeps tests off the network: geocoding only knows TEST_LOCATIONS and no city list is fetched."""
+    monkeypatch.setattr(FetchCities, "GAZETTEER", Gazetteer.from_locations(TEST_LOCATIONS, "Romania"))
+    monkeypatch.setattr(FetchCities, "NOMINATIM_FALLBACK", False)
+    monkeypatch.setattr(FetchCities, "GEOCODE_CACHE", GeocodeCache(tmp_path / "geocode.sqlite3"))
+    monkeypatch.setattr(FetchCities, "GEOCODE_POOL", GeocodePool(FetchCities._resolve, rate=1000))
+    monkeypatch.setattr(FetchCities, "PLACE_INDEX", GeoGrid())
+    monkeypatch.setattr(FetchCities, "CATALOGUE", CityCatalogue(_offline_fetch, tmp_path / "cities"))
+    # A background thread would read the module globals after monkeypatch restored the real ones.
+    monkeypatch.setattr(FetchCities, "index_places", lambda cities, country: FetchCities._index_places(list(cities), country))
@@ -0,0 +1,286 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from database import db
+from models.Booking import Booking
+from models.RideOffer import RideOffer
+from models.User import User
+from models.enums import BookingStatus, UserRole
+
+PASSENGERS = 24
+SEATS = 5
+
+
+@pytest.fixture
+def database_uri(tmp_path):
+    # A file database: every thread gets its own connection, so transactions really overlap.
+    return f"sqlite:///{tmp_path / 'bookings.db'}"
+
+
+@pytest.fixture
+def driver_headers(mock_app):
+    with mock_app.app_context():
+        token = create_access_token(identity="1", additional_claims={"id": "1", "role": UserRole.DRIVER})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def passenger_headers(mock_app):
+    with mock_app.app_context():
+        token = create_access_token(identity="2", additional_claims={"id": "2", "role": UserRole.DEFAULT})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def pending_bookings(mock_app):
+    """A ride with SEATS seats and one pending booking from each of PASSENGERS passengers."""
+    with mock_app.app_context():
+        db.session.add_all(
+            User(id=100 + i, username=f"p{i}", email=f"p{i}@example.com",
+                 password=hashlib.sha256(b"test").hexdigest(), role=UserRole.DEFAULT,
+                 first_name="P", last_name=str(i))
+            for i in range(PASSENGERS - 1)
+        )
+        ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=4102444800,
+                         price=50, available_seats=SEATS)
+        db.session.add(ride)
+        db.session.flush()
+        bookings = [Booking(ride_id=ride.id, passenger_id=passenger_id, status=BookingStatus.PENDING)
+                    for passenger_id in [2, *range(100, 100 + PASSENGERS - 1)]]
+        db.session.add_all(bookings)
+        db.session.commit()
+        return ride.id, [booking.id for booking in bookings]
+
+
+def _ride_state(mock_app, ride_id):
+    with mock_app.app_context():
+        accepted = Booking.query.filter_by(ride_id=ride_id, status=BookingStatus.ACCEPTED).count()
+        return db.session.get(RideOffer, ride_id).available_seats, accepted
+
+
+def test_concurrent_accepts_never_oversell(mock_app, driver_headers, pending_bookings):
+    ride_id, booking_ids = pending_bookings
+
+    def accept(booking_id):
+        return mock_app.test_client().post(f"/bookings/accept/{booking_id}", headers=driver_headers).status_code
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        statuses = list(pool.map(accept, booking_ids))
+
+    assert statuses.count(200) == SEATS
+    assert statuses.count(400) == PASSENGERS - SEATS
+    assert _ride_state(mock_app, ride_id) == (0, SEATS)
+
+
+def test_accepting_twice_takes_one_seat(client, mock_app, driver_headers, pending_bookings):
+    ride_id, booking_ids = pending_bookings
+
+    assert client.post(f"/bookings/accept/{booking_ids[0]}", headers=driver_headers).status_code == 200
+    assert client.post(f"/bookings/accept/{booking_ids[0]}", headers=driver_headers).status_code == 409
+    assert _ride_state(mock_app, ride_id) == (SEATS - 1, 1)
+
+
+def test_deleting_an_accepted_booking_releases_its_seat_once(client, mock_app, driver_headers,
+                                                             passenger_headers, pending_bookings):
+    ride_id, booking_ids = pending_bookings
+    client.post(f"/bookings/accept/{booking_ids[0]}", headers=driver_headers)
+
+    assert client.post(f"/bookings/delete/{booking_ids[0]}", headers=passenger_headers).status_code == 200
+    assert client.post(f"/bookings/delete/{booking_ids[0]}", headers=passenger_headers).status_code == 404
+    assert _ride_state(mock_app, ride_id) == (SEATS, 0)
+
+
+def test_bulk_decisions_share_one_transaction(client, mock_app, driver_headers, pending_bookings, query_counter):
+    ride_id, booking_ids = pending_bookings
+    with mock_app.app_context():
+        other_ride = RideOffer(author_id=2, source="Cluj", destination="Iasi", departure_date=4102444800,
+                               price=50, available_seats=3)
+        db.session.add(other_ride)
+        db.session.flush()
+        foreign = Booking(ride_id=other_ride.id, passenger_id=100, status=BookingStatus.PENDING)
+        db.session.add(foreign)
+        db.session.commit()
+        foreign_id = foreign.id
+
+    decisions = [{"booking_id": booking_id, "decision": "accept"} for booking_id in booking_ids[:SEATS + 2]]
+    decisions += [{"booking_id": booking_id, "decision": "deny"} for booking_id in booking_ids[SEATS + 2:SEATS + 4]]
+    decisions += [{"booking_id": foreign_id, "decision": "accept"}, {"booking_id": 9999, "decision": "deny"}]
+    query_counter.clear()
+
+    response = client.post("/bookings/decide", json={"decisions": decisions}, headers=driver_headers)
+
+    codes = {item["booking_id"]: item["status_code"] for item in response.get_json()["content"]}
+    assert [codes[booking_id] for booking_id in booking_ids[:SEATS]] == [200] * SEATS
+    assert [codes[booking_id] for booking_id in booking_ids[SEATS:SEATS + 2]] == [400, 400]
+    assert [codes[booking_id] for booking_id in booking_ids[SEATS + 2:SEATS + 4]] == [200, 200]
+    assert codes[foreign_id] == 403 and codes[9999] == 404
+    assert _ride_state(mock_app, ride_id) == (0, SEATS)
+    writes = [statement for statement in query_counter if statement.lstrip().upper().startswith("UPDATE")]
+    # accept transition, one seat grab for the whole ride, revert of the unseated, deny.
+    assert len(writes) == 4
+
+
+def test_bulk_decisions_are_validated(client, driver_headers, pending_bookings):
+    _ride_id, booking_ids = pending_bookings
+    duplicate = [{"booking_id": booking_ids[0], "decision": "accept"}, {"booking_id": booking_ids[0], "decision": "deny"}]
+
+    assert client.post("/bookings/decide", json={"decisions": []}, headers=driver_headers).status_code == 400
+    assert client.post("/bookings/decide", json={"decisions": duplicate}, headers=driver_headers).status_code == 400
+    assert client.post("/bookings/decide", json={"decisions": [{"booking_id": "1", "decision": "maybe"}]},
+                       headers=driver_headers).status_code == 400
+
+
+@pytest.mark.parametrize("pending", [1, 20])
+def test_incoming_bookings_constant_query_count(client, mock_app, driver_headers, query_counter, pending):
+    from unittest.mock import patch
+    from models.RatingStats import RatingStats
+
+    with mock_app.app_context():
+        for i in range(pending):
+            db.session.add(User(id=200 + i, username=f"in{i}", email=f"in{i}@example.com", password="x",
+                                role=UserRole.DEFAULT, first_name="In", last_name=str(i)))
+            ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=4102444800 + i,
+                             price=50, available_seats=3)
+            db.session.add(ride)
+            db.session.flush()
+            db.session.add(Booking(ride_id=ride.id, passenger_id=200 + i, status=BookingStatus.PENDING))
+        db.session.add(RatingStats(user_id=200, review_count=2, rating_sum=9))
+        db.session.commit()
+
+    rendered = []
+
+    def fake_render(_template, **context):
+        # Touch everything the template reads, so lazy loads would show up as queries.
+        rendered.extend(
+            (b.ride.source, b.ride.available_seats, b.passenger.username, b.passenger_avg_rating, b.passenger_total_reviews)
+            for b in context["bookings"]
+        )
+        return ""
+
+    query_counter.clear()
+    with patch("blueprints.Bookings.render_template", side_effect=fake_render):
+        assert client.get("/bookings/incoming", headers=driver_headers).status_code == 200
+
+    assert len(rendered) == pending
+    assert rendered[0] == ("Iasi", 3, "in0", 4.5, 2)
+    assert len(query_counter) == 1
+
+
+@pytest.mark.parametrize("trips", [1, 15])
+@pytest.mark.parametrize("page, headers_fixture, person, expected_queries", [
+    ("/bookings/my", "passenger_headers", lambda b: b.ride.author.username, 2),
+    ("/bookings/accepted_driver", "driver_headers", lambda b: b.passenger.username, 2),
+    ("/bookings/accepted", "passenger_headers", lambda b: b.review_target_name, 1),
+])
+def test_booking_listings_constant_query_count(client, mock_app, query_counter, request, trips, page,
+                                              headers_fixture, person, expected_queries):
+    from unittest.mock import patch
+    from models.Review import Review
+
+    with mock_app.app_context():
+        for i in range(trips):
+            ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=1700000000 + i,
+                             price=50, available_seats=3)
+            db.session.add(ride)
+            db.session.flush()
+            booking = Booking(ride_id=ride.id, passenger_id=2, status=BookingStatus.ACCEPTED)
+            db.session.add(booking)
+            db.session.flush()
+            if i % 2 == 0:
+                reviewer, reviewed = (2, 1) if headers_fixture == "passenger_headers" else (1, 2)
+                db.session.add(Review(booking_id=booking.id, reviewer_id=reviewer, reviewed_id=reviewed, rating=5))
+        db.session.commit()
+
+    rendered = []
+
+    def fake_render(_template, **context):
+        # Touch what the template reads, so lazy loads would show up as queries.
+        rendered.extend(
+            (b.has_reviewed, b.ride.source, b.departure_display, person(b))
+            for b in context["bookings"]
+        )
+        return ""
+
+    query_counter.clear()
+    with patch("blueprints.Bookings.render_template", side_effect=fake_render):
+        assert client.get(page, headers=request.getfixturevalue(headers_fixture)).status_code == 200
+
+    expected = [i % 2 == 0 for i in range(trips)]
+    if page == "/bookings/accepted":
+        expected.reverse()  # newest departure first
+    assert [has_reviewed for has_reviewed, *_ in rendered] == expected
+    assert len(query_counter) <= expected_queries
+
+
+def test_accepted_bookings_merges_both_roles_and_pages_by_departure(client, mock_app, passenger_headers):
+    from unittest.mock import patch
+
+    with mock_app.app_context():
+        for i in range(5):
+            as_passenger = i % 2 == 0
+            ride = RideOffer(author_id=1 if as_passenger else 2, source="Iasi", destination="Cluj",
+                             departure_date=1700000000 + i, price=50, available_seats=3)
+            db.session.add(ride)
+            db.session.flush()
+            db.session.add(Booking(ride_id=ride.id, passenger_id=2 if as_passenger else 1,
+                                   status=BookingStatus.ACCEPTED))
+        db.session.commit()
+
+    pages = []
+
+    def fake_render(_template, **context):
+        pages.append(([(b.ride.departure_date, b.review_target_id, b.review_target_name)
+                       for b in context["bookings"]], context["next_cursor"]))
+        return ""
+
+    cursor = None
+    with patch("blueprints.Bookings.render_template", side_effect=fake_render):
+        while True:
+            client.get("/bookings/accepted", query_string={"limit": 2, **({"cursor": cursor} if cursor else {})},
+                       headers=passenger_headers)
+            cursor = pages[-1][1]
+            if cursor is None:
+                break
+
+    seen = [item for items, _cursor in pages for item in items]
+    assert [len(items) for items, _cursor in pages] == [2, 2, 1]
+    assert [departure for departure, *_ in seen] == [1700000000 + i for i in reversed(range(5))]
+    assert all(target == 1 and name == "Driver User" for _d, target, name in seen)
+
+
+def test_request_booking_inserts_without_checking_first(client, mock_app, passenger_headers, query_counter):
+    with mock_app.app_context():
+        ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=4102444800, price=50,
+                         available_seats=3)
+        db.session.add(ride)
+        db.session.commit()
+        ride_id = ride.id
+
+    query_counter.clear()
+    assert client.post(f"/bookings/request/{ride_id}", headers=passenger_headers).status_code == 201
+    assert not [statement for statement in query_counter if "FROM booking" in statement]
+
+    again = client.post(f"/bookings/request/{ride_id}", headers=passenger_headers)
+    assert again.status_code == 400 and again.get_json()["message"] == "Already booked"
+    with mock_app.app_context():
+        assert Booking.query.filter_by(ride_id=ride_id).count() == 1
+
+
+def test_take_seats_grants_what_is_left_in_one_update(mock_app, query_counter):
+    from blueprints.Bookings import take_seats
+
+    with mock_app.app_context():
+        ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=4102444800, price=50,
+                         available_seats=3)
+        db.session.add(ride)
+        db.session.commit()
+
+        query_counter.clear()
+        assert take_seats(ride.id, 2) == (2, 1)
+        assert take_seats(ride.id, 5) == (1, 0)
+        assert take_seats(ride.id, 1) == (0, None)
+        writes = [statement for statement in query_counter if statement.lstrip().upper().startswith("UPDATE")]
+        assert len(writes) == 2
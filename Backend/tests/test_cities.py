@@ -0,0 +1,135 @@
+import gzip
+import json
+import time
+import threading
+from threading import Event
+
+import pytest
+import FetchCities
+from CityCatalogue import CityCatalogue
+from CityIndex import CityIndex, normalize
+
+CITIES = ["Brașov", "Bragadiru", "Brăila", "Bucharest", "Cluj-Napoca", "Constanța", "Craiova", "Iași",
+          "Târgu Mureș", "Timișoara"]
+
+
+@pytest.fixture
+def index():
+    return CityIndex(CITIES)
+
+
+def test_normalize_strips_diacritics():
+    assert normalize("  Târgu  MUREȘ ") == "targu mures"
+
+
+def test_prefix_match_is_diacritic_insensitive(index):
+    assert index.search("bras")[0] == "Brașov"
+    assert index.search("IAS") == ["Iași"]
+
+
+def test_prefix_results_rank_shorter_names_first(index):
+    assert index.search("br", limit=3) == ["Brăila", "Brașov", "Bragadiru"]
+
+
+def test_word_prefix_matches_inside_name(index):
+    assert index.search("napo") == ["Cluj-Napoca"]
+    assert index.search("mure") == ["Târgu Mureș"]
+
+
+def test_typos_are_tolerated(index):
+    assert index.search("timisaora")[0] == "Timișoara"
+    assert index.search("kraiova") == ["Craiova"]
+
+
+def test_empty_query(index):
+    assert index.search("") == []
+
+
+def test_autocomplete_endpoint(client):
+    FetchCities.load("testland", CITIES)
+    response = client.get("/cities/testland/autocomplete", query_string={"q": "const"})
+    assert response.status_code == 200
+    assert response.get_json()["content"] == ["Constanța"]
+
+
+def test_autocomplete_endpoint_country_still_loading(client):
+    response = client.get("/cities/moldova/autocomplete", query_string={"q": "a"})
+    assert response.get_json()["content"] == []
+
+
+def test_unknown_country_gets_no_entry_and_no_fetch(client, monkeypatch, tmp_path):
+    fetched = []
+    monkeypatch.setattr(FetchCities, "CATALOGUE", CityCatalogue(fetched.append, tmp_path))
+    threads = threading.active_count()
+
+    assert client.get("/cities/nowhere").status_code == 404
+    assert client.get("/cities/nowhere/autocomplete", query_string={"q": "a"}).status_code == 404
+
+    assert FetchCities.CATALOGUE.status() == {}
+    assert threading.active_count() == threads
+    assert fetched == []
+
+
+def test_catalogue_serves_snapshot_and_refreshes_in_background(tmp_path):
+    CityCatalogue(lambda country: [], tmp_path, countries=["testland"]).put("Testland", CITIES, persist=True)
+    release = Event()
+
+    def slow_fetch(country):
+        release.wait(5)
+        return CITIES + ["Zalău"]
+
+    catalogue = CityCatalogue(slow_fetch, tmp_path, countries=["testland"])
+    catalogue.ensure("testland", force=True)
+    assert catalogue.get("testland") == CITIES
+    assert catalogue.index("testland").search("const") == ["Constanța"]
+
+    release.set()
+    for _ in range(100):
+        if not catalogue.status()["testland"]["refreshing"]:
+            break
+        time.sleep(0.05)
+    assert catalogue.get("testland")[-1] == "Zalău"
+    assert CityCatalogue(slow_fetch, tmp_path, countries=["testland"]).get("testland")[-1] == "Zalău"
+
+
+def test_cities_endpoint_does_not_block_when_upstream_is_down(client):
+    response = client.get("/cities/moldova")
+    assert response.status_code == 503
+    assert response.get_json()["status"] == "loading"
+
+    FetchCities.load("testland", CITIES)
+    assert client.get("/cities/testland").get_json()["content"] == CITIES
+    assert client.get("/cities/status").get_json()["content"]["testland"]["ready"] is True
+
+
+def test_city_list_is_compressed_and_revalidated(client):
+    FetchCities.load("testland", CITIES * 20)
+
+    response = client.get("/cities/testland", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data))["content"] == CITIES * 20
+    etag = response.headers["ETag"]
+
+    cached = client.get("/cities/testland", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.data == b""
+
+    FetchCities.load("testland", CITIES)
+    changed = client.get("/cities/testland", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert changed.get_json()["content"] == CITIES
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip;q=0.0", "gzip; q=0.00, identity", "br;q=0.000, gzip;q=0"])
+def test_refused_encodings_are_not_sent(client, accept_encoding):
+    FetchCities.load("testland", CITIES * 20)
+
+    response = client.get("/cities/testland", headers={"Accept-Encoding": accept_encoding})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["content"] == CITIES * 20
+
+
+def test_weighted_encoding_is_still_accepted():
+    from PreparedResponse import PreparedResponse
+
+    prepared = PreparedResponse.from_json(CITIES * 20)
+    assert prepared.negotiate("gzip;q=0.5, br;q=0")[0] == "gzip"
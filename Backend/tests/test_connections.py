@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+import pytest
+from ConnectionGraph import ConnectionGraph, Leg
+from models.enums import UserRole
+
+HOUR = 3600
+T0 = 1_900_000_000
+
+
+@pytest.fixture
+def graph():
+    graph = ConnectionGraph()
+    graph.add(Leg(1, "A", "B", T0, T0 + 2 * HOUR, 3))
+    graph.add(Leg(2, "B", "C", T0 + 2 * HOUR + 5 * 60, T0 + 3 * HOUR, 3))  # too tight a transfer
+    graph.add(Leg(3, "B", "C", T0 + 3 * HOUR, T0 + 5 * HOUR, 3))
+    graph.add(Leg(4, "A", "C", T0 + 4 * HOUR, T0 + 9 * HOUR, 3))
+    graph.add(Leg(5, "C", "D", T0 + 6 * HOUR, T0 + 7 * HOUR, 1))
+    return graph
+
+
+def ride_ids(journey):
+    return [leg.ride_id for leg in journey] if journey else None
+
+
+def test_earliest_arrival_respects_transfer_time(graph):
+    assert ride_ids(graph.earliest_arrival("A", "C", T0)) == [1, 3]
+    assert ride_ids(graph.earliest_arrival("A", "C", T0, min_transfer=0)) == [1, 2]
+
+
+def test_earliest_arrival_respects_seats_and_leg_bound(graph):
+    assert ride_ids(graph.earliest_arrival("A", "D", T0)) == [1, 3, 5]
+    assert graph.earliest_arrival("A", "D", T0, seats=2) is None
+    assert graph.earliest_arrival("A", "D", T0, max_legs=2) is None
+
+
+def test_incremental_updates(graph):
+    graph.remove(3)
+    assert ride_ids(graph.earliest_arrival("A", "C", T0)) == [4]
+
+    graph.set_seats(4, 0)
+    assert graph.earliest_arrival("A", "C", T0) is None
+
+    graph.add(Leg(6, "B", "C", T0 + 4 * HOUR, T0 + 5 * HOUR, 2))
+    assert ride_ids(graph.earliest_arrival("A", "C", T0)) == [1, 6]
+
+    assert graph.prune(T0 + HOUR) == 1
+    assert graph.earliest_arrival("A", "C", T0) is None
+
+
+def test_connections_endpoint_follows_created_and_cancelled_rides(client, mock_app):
+    with mock_app.app_context():
+        driver = create_access_token(identity="1", additional_claims={"role": UserRole.DRIVER})
+        passenger = create_access_token(identity="2", additional_claims={"role": UserRole.DEFAULT})
+
+    start = int((datetime.now() + timedelta(days=1)).timestamp())
+    first = client.post("/rides/create", json={"source": "Iasi", "destination": "Bucuresti", "departure_date": start,
+                                               "price": 40, "available_seats": 2},
+                        headers={"Authorization": f"Bearer {driver}"}).get_json()["content"]["id"]
+    second = client.post("/rides/create", json={"source": "Bucuresti", "destination": "Cluj",
+                                                "departure_date": start + 8 * HOUR, "price": 60, "available_seats": 2},
+                         headers={"Authorization": f"Bearer {driver}"}).get_json()["content"]["id"]
+
+    response = client.get("/rides/api/connections", query_string={"from_city": "Iasi", "to_city": "Cluj"},
+                          headers={"Authorization": f"Bearer {passenger}"})
+    legs = response.get_json()["content"]
+    assert response.status_code == 200
+    assert [leg["ride_id"] for leg in legs] == [first, second]
+    assert [leg["price"] for leg in legs] == [40, 60]
+
+    client.post(f"/rides/cancel/{second}", headers={"Authorization": f"Bearer {driver}"})
+    response = client.get("/rides/api/connections", query_string={"from_city": "Iasi", "to_city": "Cluj"},
+                          headers={"Authorization": f"Bearer {passenger}"})
+    assert response.get_json()["content"] is None
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import FetchCities
+from DistanceMatrix import CityDistanceMatrix, many_to_many, one_to_many
+from conftest import TEST_LOCATIONS
+
+
+def test_batch_distances_match_scalar_haversine():
+    names = list(TEST_LOCATIONS)
+    points = [TEST_LOCATIONS[name] for name in names]
+
+    matrix = many_to_many(points, points)
+    assert matrix.shape == (len(names), len(names))
+    assert np.allclose(np.diag(matrix), 0)
+    for i, a in enumerate(points):
+        for j, b in enumerate(points):
+            assert matrix[i, j] == pytest.approx(FetchCities.distance(a, b), rel=1e-9)
+
+    assert one_to_many(points[0], points) == pytest.approx(matrix[0])
+
+
+def test_matrix_roundtrip_is_memory_mapped(tmp_path):
+    built = CityDistanceMatrix.build(TEST_LOCATIONS)
+    built.save(tmp_path / "testland")
+
+    loaded = CityDistanceMatrix.load(tmp_path / "testland")
+    assert isinstance(loaded.matrix, np.memmap)
+    assert loaded.get("Iasi", "Cluj") == pytest.approx(built.get("Iasi", "Cluj"))
+    assert loaded.get("Iasi", "Nowhere") is None
+    assert CityDistanceMatrix.load(tmp_path / "missing") is None
+
+
+def test_city_distance_prefers_matrix(monkeypatch):
+    matrix = CityDistanceMatrix.build({"A": (45.0, 25.0), "B": (46.0, 25.0)})
+    monkeypatch.setitem(FetchCities.DISTANCE_CACHE, "testland", matrix)
+
+    assert FetchCities.city_distance("A", "B", "Testland") == pytest.approx(111.19, abs=0.1)
+    assert FetchCities.city_distance("Iasi", "Cluj", "Testland") == pytest.approx(
+        FetchCities.distance(TEST_LOCATIONS["Iasi"], TEST_LOCATIONS["Cluj"]))
+
+
+def test_chat_distance_is_served_from_the_matrix(client, mock_app, monkeypatch):
+    pytest.importorskip("torch")
+    from flask_jwt_extended import create_access_token
+    from blueprints import ChatService
+
+    mock_app.register_blueprint(ChatService.chat_route)
+    matrix = CityDistanceMatrix.build({"Sibiu": (45.0, 25.0), "Medias": (46.0, 25.0)})
+    monkeypatch.setitem(FetchCities.DISTANCE_CACHE, "romania", matrix)
+    monkeypatch.setattr(FetchCities, "cached_location", lambda *args, **kwargs: pytest.fail("geocoded"))
+    monkeypatch.setattr(ChatService, "detect_intent", lambda text: "distance")
+    monkeypatch.setattr(ChatService, "extract_locations", lambda text: ["Sibiu", "Medias"])
+    monkeypatch.setattr(ChatService, "generate_chat_reply", lambda prompt: prompt)
+    ChatService.MODEL_EVENT.set()
+
+    with mock_app.app_context():
+        token = create_access_token(identity="2")
+    response = client.post("/chat/message", json={"message": "How far is Sibiu from Medias?"},
+                           headers={"Authorization": f"Bearer {token}"})
+
+    assert "111.19 km" in response.get_json()["reply"]
+
+
+def test_cached_distance_reads_the_matrix_without_geocoding(monkeypatch):
+    matrix = CityDistanceMatrix.build({"Sibiu": (45.0, 25.0), "Medias": (46.0, 25.0)})
+    monkeypatch.setitem(FetchCities.DISTANCE_CACHE, "romania", matrix)
+    monkeypatch.setattr(FetchCities, "cached_location", lambda *args, **kwargs: pytest.fail("geocoded"))
+
+    assert FetchCities.cached_distance("Sibiu", "Medias", "Romania") == pytest.approx(111.19, abs=0.1)
@@ -0,0 +1,44 @@
+import ExpirySweeper
+from ConnectionGraph import CONNECTIONS, Leg
+from database import db
+from models.Booking import Booking
+from models.RideOffer import RideOffer
+from models.enums import BookingStatus
+
+NOW = 1_900_000_000
+
+
+def _ride(departure, **kwargs):
+    return RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=departure, price=50,
+                     available_seats=3, **kwargs)
+
+
+def test_sweep_deactivates_departed_rides_and_expires_pending_bookings(mock_app):
+    past, soon, later = _ride(NOW - 600), _ride(NOW + 1800), _ride(NOW + 7200)
+    db.session.add_all([past, soon, later])
+    db.session.flush()
+    db.session.add_all([
+        Booking(ride_id=past.id, passenger_id=2, status=BookingStatus.PENDING),
+        Booking(ride_id=soon.id, passenger_id=2, status=BookingStatus.ACCEPTED),
+        Booking(ride_id=later.id, passenger_id=2, status=BookingStatus.PENDING),
+    ])
+    db.session.commit()
+    CONNECTIONS.add(Leg(past.id, "Iasi", "Cluj", NOW - 600, NOW + 3600, 3))
+
+    assert ExpirySweeper.sweep(now=NOW) == (2, 1)
+    assert ExpirySweeper.sweep(now=NOW) == (0, 0)
+
+    db.session.expire_all()
+    assert [r.active for r in (past, soon, later)] == [False, False, True]
+    statuses = {b.ride_id: b.status for b in Booking.query.all()}
+    assert statuses == {past.id: BookingStatus.EXPIRED, soon.id: BookingStatus.ACCEPTED,
+                        later.id: BookingStatus.PENDING}
+    assert len(CONNECTIONS) == 0
+
+
+def test_sweep_works_in_bounded_chunks(mock_app):
+    db.session.add_all([_ride(NOW - 3600 - i) for i in range(7)])
+    db.session.commit()
+
+    assert ExpirySweeper.sweep(now=NOW, chunk_size=3) == (7, 0)
+    assert RideOffer.query.filter_by(active=True).count() == 0
@@ -0,0 +1,50 @@
+import FetchCities
+from Gazetteer import Gazetteer
+
+ROWS = [
+    # geonameid, name, asciiname, alternatenames, lat, lon, class, code, country, cc2, a1..a4, population, ...
+    ["683506", "București", "Bucuresti", "Bucharest,Bukarest", "44.43225", "26.10626", "P", "PPLC", "RO", "",
+     "10", "", "", "", "1877155", "", "83", "Europe/Bucharest", "2024-01-01"],
+    ["675810", "Iași", "Iasi", "Jassy", "47.16667", "27.6", "P", "PPLA", "RO", "", "25", "", "", "", "318012",
+     "", "50", "Europe/Bucharest", "2024-01-01"],
+    ["999001", "Iași", "Iasi", "", "44.5", "25.5", "P", "PPL", "RO", "", "10", "", "", "", "120", "", "50",
+     "Europe/Bucharest", "2024-01-01"],
+    ["999002", "Lacul Iasi", "Lacul Iasi", "", "46.0", "24.0", "H", "LK", "RO", "", "10", "", "", "", "0", "",
+     "50", "Europe/Bucharest", "2024-01-01"],
+    ["618426", "Chișinău", "Chisinau", "Kishinev", "47.00556", "28.8575", "P", "PPLC", "MD", "", "57", "", "", "",
+     "635994", "", "50", "Europe/Chisinau", "2024-01-01"],
+]
+
+
+def _gazetteer(tmp_path):
+    path = tmp_path / "geonames.txt"
+    path.write_text("\n".join("\t".join(row) for row in ROWS) + "\n", encoding="utf-8")
+    return Gazetteer.load(path)
+
+
+def test_load_keeps_populated_places_and_prefers_most_populous(tmp_path):
+    gazetteer = _gazetteer(tmp_path)
+
+    assert len(gazetteer) == 4
+    assert gazetteer.lookup("Iasi", "Romania") == (47.16667, 27.6)
+    assert gazetteer.lookup("Lacul Iasi", "Romania") is None
+
+
+def test_lookup_matches_alternate_names_and_diacritics(tmp_path):
+    gazetteer = _gazetteer(tmp_path)
+
+    assert gazetteer.lookup("Bucharest", "Romania") == (44.43225, 26.10626)
+    assert gazetteer.lookup("BUCUREȘTI", "RO") == (44.43225, 26.10626)
+    assert gazetteer.lookup("Chisinau", "Romania") is None
+    assert gazetteer.lookup("Kishinev", None) == (47.00556, 28.8575)
+
+
+def test_get_location_never_calls_nominatim_when_fallback_is_off(tmp_path, monkeypatch):
+    def fail(*_args):
+        raise AssertionError("network used")
+
+    monkeypatch.setattr(FetchCities, "_fetch_location", fail)
+    FetchCities.use_geocoder(_gazetteer(tmp_path), fallback=False)
+
+    assert FetchCities.get_location("Iasi", "Romania") == (47.16667, 27.6)
+    assert FetchCities.get_location("Atlantis", "Romania") == FetchCities.CENTROID
@@ -0,0 +1,84 @@
+import os
+from pathlib import Path
+
+import requests
+import FetchCities
+from GeocodeCache import GeocodeCache
+
+
+def test_keys_are_country_aware(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3")
+    cache.put("Victoria", "Romania", (45.73, 24.70))
+    cache.put("Victoria", "Canada", (48.43, -123.37))
+
+    assert cache.get("Victoria", "Romania") == (True, (45.73, 24.70))
+    assert cache.get("victoria", "CANADA") == (True, (48.43, -123.37))
+    assert cache.get("Victoria", "Malta") == (False, None)
+
+
+def test_entries_are_shared_between_instances(tmp_path):
+    GeocodeCache(tmp_path / "geo.sqlite3").put("Iasi", "Romania", (47.16, 27.6))
+    assert GeocodeCache(tmp_path / "geo.sqlite3").get("Iași", "Romania") == (True, (47.16, 27.6))
+
+
+def test_ttl_and_negative_entries(tmp_path):
+    now = [1000.0]
+    cache = GeocodeCache(tmp_path / "geo.sqlite3", ttl=100, negative_ttl=10, clock=lambda: now[0])
+    cache.put("Iasi", "Romania", (47.16, 27.6))
+    cache.put("Atlantis", "Romania", None)
+
+    assert cache.get("Atlantis", "Romania") == (True, None)
+    now[0] += 11
+    assert cache.get("Atlantis", "Romania") == (False, None)
+    assert cache.get("Iasi", "Romania")[0] is True
+    now[0] += 100
+    assert cache.get("Iasi", "Romania") == (False, None)
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_lru_eviction(tmp_path):
+    now = [0.0]
+    cache = GeocodeCache(tmp_path / "geo.sqlite3", max_entries=2, clock=lambda: now[0])
+    for city in ("A", "B", "C"):
+        now[0] += 1000
+        cache.put(city, "Romania", (1.0, 1.0))
+    now[0] += 1000
+    cache.get("A", "Romania")
+
+    assert cache.evict() == 1
+    assert cache.get("B", "Romania") == (False, None)
+    assert cache.get("A", "Romania")[0] and cache.get("C", "Romania")[0]
+
+
+def test_get_location_caches_results_and_misses(monkeypatch):
+    calls = []
+
+    def fake_fetch(city, country):
+        calls.append(city)
+        if city == "Atlantis":
+            raise ValueError("not found")
+        if city == "Offline":
+            raise requests.ConnectionError()
+        return 46.0, 24.0
+
+    monkeypatch.setattr(FetchCities, "_fetch_location", fake_fetch)
+    monkeypatch.setattr(FetchCities, "NOMINATIM_FALLBACK", True)
+    FetchCities.load("Romania", ["Sighisoara", "Atlantis", "Offline"])
+
+    for _ in range(2):
+        assert FetchCities.get_location("Sighisoara", "Romania") == (46.0, 24.0)
+        assert FetchCities.get_location("Atlantis", "Romania") == FetchCities.CENTROID
+        assert FetchCities.get_location("Offline", "Romania") == FetchCities.CENTROID
+
+    assert calls == ["Sighisoara", "Atlantis", "Offline", "Offline"]
+
+
+def test_importing_fetch_cities_opens_no_cache(tmp_path):
+    import subprocess
+    import sys
+
+    backend = Path(__file__).resolve().parents[1]
+    script = "import FetchCities; assert FetchCities.GEOCODE_CACHE is None"
+    subprocess.run([sys.executable, "-c", script], cwd=tmp_path, check=True,
+                   env={**os.environ, "PYTHONPATH": str(backend)})
+    assert not (tmp_path / "data").exists()
@@ -0,0 +1,112 @@
+from queue import Full
+from threading import Event, Thread
+
+import FetchCities
+from GeocodePool import GeocodePool, RateLimiter
+
+
+def test_concurrent_lookups_of_one_key_are_coalesced():
+    release = Event()
+    calls = []
+
+    def slow_fetch(city):
+        calls.append(city)
+        release.wait(5)
+        return city.upper()
+
+    pool = GeocodePool(slow_fetch, rate=1000)
+    futures = []
+    threads = [Thread(target=lambda: futures.append(pool.submit("iasi", "Iasi"))) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    release.set()
+
+    assert {future.result(5) for future in futures} == {"IASI"}
+    assert calls == ["Iasi"]
+    assert pool.stats()["coalesced"] == 49
+
+
+def test_rate_limiter_spaces_out_requests():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(2, burst=1, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        limiter.acquire()
+
+    assert slept == [0.5, 0.5]
+
+
+def test_batch_resolves_missing_cities_concurrently(monkeypatch):
+    monkeypatch.setattr(FetchCities, "_fetch_location", lambda city, country: (float(len(city)), 24.0))
+    monkeypatch.setattr(FetchCities, "NOMINATIM_FALLBACK", True)
+    FetchCities.load("Romania", ["Iasi", "Sibiu", "Brasov"])
+
+    locations = FetchCities.get_locations(["Iasi", "Sibiu", "Brasov", "Sibiu"], "Romania", timeout=5)
+
+    assert locations["Iasi"] == (47.1585, 27.6014)
+    assert locations["Sibiu"] == (5.0, 24.0)
+    assert locations["Brasov"] == (6.0, 24.0)
+    assert FetchCities.GEOCODE_CACHE.get("Brasov", "Romania") == (True, (6.0, 24.0))
+
+
+def test_cached_distance_schedules_a_background_resolve(monkeypatch):
+    release = Event()
+
+    def fetch(city, country):
+        release.wait(5)
+        return 45.79, 24.15
+
+    monkeypatch.setattr(FetchCities, "_fetch_location", fetch)
+    monkeypatch.setattr(FetchCities, "NOMINATIM_FALLBACK", True)
+    FetchCities.load("Romania", ["Iasi", "Sibiu"])
+
+    assert FetchCities.cached_distance("Iasi", "Sibiu", "Romania") is None
+    assert FetchCities.GEOCODE_POOL.stats()["submitted"] == 1
+    release.set()
+    FetchCities.GEOCODE_POOL.submit(FetchCities._pool_key("Sibiu", "Romania"), "Sibiu", "Romania").result(5)
+
+    assert 290 < FetchCities.cached_distance("Iasi", "Sibiu", "Romania") < 320
+
+
+def test_only_listed_cities_are_sent_upstream(monkeypatch):
+    calls = []
+    monkeypatch.setattr(FetchCities, "_fetch_location", lambda city, country: calls.append(city) or (46.0, 24.0))
+    monkeypatch.setattr(FetchCities, "NOMINATIM_FALLBACK", True)
+    FetchCities.load("Romania", ["Sibiu"])
+
+    assert FetchCities.cached_location("asdfgh", "Romania") is None
+    assert FetchCities.cached_location("Sibiu", None) is None
+    assert FetchCities.get_location("qwerty", "Romania") == FetchCities.CENTROID
+    assert FetchCities.get_location("Sibiu", "Romania") == (46.0, 24.0)
+    assert calls == ["Sibiu"]
+
+
+def test_pending_keys_are_capped():
+    release = Event()
+    pool = GeocodePool(lambda key: release.wait(5), rate=1000, workers=1, max_pending=2)
+
+    accepted = [pool.submit(key, key) for key in ("a", "b")]
+    refused = pool.submit("c", "c")
+
+    assert isinstance(refused.exception(0), Full)
+    assert pool.stats()["rejected"] == 1 and pool.stats()["in_flight"] == 2
+    release.set()
+    assert all(future.result(5) for future in accepted)
+    assert pool.submit("c", "c").result(5)
+
+
+def test_get_location_gives_up_after_timeout(monkeypatch):
+    release = Event()
+    monkeypatch.setattr(FetchCities, "_fetch_location", lambda city, country: release.wait(5) and (46.0, 24.0))
+    monkeypatch.setattr(FetchCities, "NOMINATIM_FALLBACK", True)
+    FetchCities.load("Romania", ["Sibiu"])
+
+    assert FetchCities.get_location("Sibiu", "Romania", timeout=0.05) == FetchCities.CENTROID
+    release.set()
@@ -0,0 +1,110 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+import requests
+
+import FetchCities
+from HttpClient import HttpClient
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    failures = {}
+    retry_after = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        StandIn.connections.add(self.client_address)
+        path = self.path.split("?")[0]
+        if StandIn.failures.get(path, 0) > 0:
+            StandIn.failures[path] -= 1
+            self.reply(503, {}, {"Retry-After": StandIn.retry_after} if StandIn.retry_after else None)
+        elif path == "/search":
+            self.reply(200, [{"lat": "45.79", "lon": "24.15"}])
+        else:
+            self.reply(404, {})
+
+    def reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def stand_in():
+    StandIn.connections = set()
+    StandIn.failures = {}
+    StandIn.retry_after = None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_kept_alive(stand_in):
+    client = HttpClient()
+    for _ in range(5):
+        assert client.get(f"{stand_in}/search").status_code == 200
+
+    assert len(StandIn.connections) == 1
+    host = client.stats()[stand_in.removeprefix("http://")]
+    assert host["requests"] == 5 and host["p50_ms"] is not None
+
+
+def test_unavailable_answers_are_retried_with_backoff(stand_in):
+    delays = []
+    StandIn.failures["/search"] = 2
+    client = HttpClient(retries=2, sleep=delays.append)
+
+    assert client.get(f"{stand_in}/search").status_code == 200
+    assert len(delays) == 2 and all(0 <= delay <= 8 for delay in delays)
+    assert client.stats()[stand_in.removeprefix("http://")]["retries"] == 2
+
+
+def test_retries_take_a_limiter_token_each(stand_in):
+    class Limiter:
+        acquired = 0
+
+        def acquire(self):
+            Limiter.acquired += 1
+
+    StandIn.failures["/search"] = 2
+    client = HttpClient(retries=2, sleep=lambda _: None)
+
+    assert client.get(f"{stand_in}/search", limiter=Limiter()).status_code == 200
+    assert Limiter.acquired == 2
+
+
+def test_long_retry_after_is_not_retried_early(stand_in):
+    delays = []
+    StandIn.failures["/search"] = 1
+    StandIn.retry_after = "120"
+    client = HttpClient(retries=2, sleep=delays.append)
+
+    assert client.get(f"{stand_in}/search").status_code == 503
+    assert delays == []
+    assert client.stats()[stand_in.removeprefix("http://")]["requests"] == 1
+
+
+def test_connection_errors_raise_after_retries():
+    client = HttpClient(retries=1, sleep=lambda _: None, timeout=0.5)
+    with pytest.raises(requests.ConnectionError):
+        client.get("http://127.0.0.1:9/unreachable")
+    assert client.stats()["127.0.0.1:9"]["errors"] == 2
+
+
+def test_fetch_location_can_point_at_a_stand_in(stand_in, monkeypatch):
+    monkeypatch.setattr(FetchCities, "HTTP_CLIENT",
+                        HttpClient(origins={"https://nominatim.openstreetmap.org": stand_in}))
+    assert FetchCities._fetch_location("Sibiu", "Romania") == (45.79, 24.15)
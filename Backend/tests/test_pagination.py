@@ -0,0 +1,123 @@
+from datetime import datetime
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+import Pagination
+from CustomHttpException import CustomHttpException
+from database import db
+from models.Booking import Booking
+from models.Review import Review
+from models.RideOffer import RideOffer
+from models.enums import BookingStatus, UserRole
+
+HISTORY = 5
+
+
+def test_cursor_round_trips_timestamps():
+    values = [datetime(2031, 5, 4, 3, 2, 1, 123456), 42]
+    assert Pagination.decode_cursor(Pagination.encode_cursor(values), [Review.created_at, Review.id]) == values
+
+
+def test_tampered_cursor_is_rejected():
+    with pytest.raises(CustomHttpException):
+        Pagination.decode_cursor("bm90LWEtY3Vyc29y", [Review.created_at, Review.id])
+
+
+@pytest.mark.parametrize("values", [["x", 1], [1700000000, "1"], [True, 1], [1700000000, 1.5], [None, 1]])
+def test_cursor_values_must_fit_their_columns(values):
+    with pytest.raises(CustomHttpException) as raised:
+        Pagination.decode_cursor(Pagination.encode_cursor(values), [RideOffer.departure_date, RideOffer.id])
+    assert raised.value.status_code == 400
+
+
+def test_search_api_rejects_cursor_of_the_wrong_type(client, mock_app):
+    with mock_app.app_context():
+        token = create_access_token(identity="2", additional_claims={"role": UserRole.DEFAULT})
+    response = client.get("/rides/api/search",
+                          query_string={"from_city": "Iasi", "to_city": "Cluj",
+                                        "cursor": Pagination.encode_cursor(["x", 1])},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Invalid cursor"
+
+
+@pytest.fixture
+def history(mock_app):
+    """HISTORY rides by the driver, each booked by the passenger and reviewed both ways."""
+    with mock_app.app_context():
+        for i in range(HISTORY):
+            ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=1700000000 + i,
+                             price=50, available_seats=3)
+            db.session.add(ride)
+            db.session.flush()
+            booking = Booking(ride_id=ride.id, passenger_id=2, status=BookingStatus.ACCEPTED)
+            db.session.add(booking)
+            db.session.flush()
+            db.session.add_all([
+                Review(booking_id=booking.id, reviewer_id=2, reviewed_id=1, rating=5),
+                Review(booking_id=booking.id, reviewer_id=1, reviewed_id=2, rating=4),
+            ])
+        db.session.commit()
+        driver = create_access_token(identity="1", additional_claims={"id": "1", "role": UserRole.DRIVER})
+        passenger = create_access_token(identity="2", additional_claims={"id": "2", "role": UserRole.DEFAULT})
+    return {"driver": {"Authorization": f"Bearer {driver}"}, "passenger": {"Authorization": f"Bearer {passenger}"}}
+
+
+@pytest.mark.parametrize("url, who, items", [
+    ("/rides/all_rides", "driver", "content"),
+    ("/bookings/my", "passenger", "content"),
+    ("/reviews/my", "passenger", "content"),
+    ("/reviews/user/1", "passenger", "reviews"),
+])
+def test_history_listings_page_through_everything(client, history, url, who, items):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = {"format": "json", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get(url, query_string=query, headers=history[who]).get_json()
+        ids += [item["id"] for item in body[items]]
+        cursor, pages = body["next_cursor"], pages + 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(ids) == len(set(ids)) == HISTORY
+
+
+def test_rows_without_a_timestamp_are_backfilled_and_paged(client, mock_app):
+    from database import LEGACY_TIMESTAMP, backfill_not_null
+
+    column = Booking.__table__.c.created_at
+    with mock_app.app_context():
+        # The table as it was before created_at became NOT NULL.
+        column.nullable = True
+        try:
+            Booking.__table__.drop(db.engine)
+            Booking.__table__.create(db.engine)
+        finally:
+            column.nullable = False
+        for i in range(3):
+            ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=1700000000 + i,
+                             price=50, available_seats=3)
+            db.session.add(ride)
+            db.session.flush()
+            created_at = None if i < 2 else datetime.utcnow()
+            db.session.execute(db.insert(Booking).values(ride_id=ride.id, passenger_id=2,
+                                                         status=BookingStatus.PENDING, created_at=created_at))
+        db.session.commit()
+
+        backfill_not_null(Booking.created_at, LEGACY_TIMESTAMP)
+        assert Booking.query.filter(Booking.created_at.is_(None)).count() == 0
+        token = create_access_token(identity="2", additional_claims={"id": "2", "role": UserRole.DEFAULT})
+
+    ids, cursor = [], None
+    while True:
+        query = {"format": "json", "limit": 1, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/bookings/my", query_string=query, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.get_json()["content"]]
+        cursor = response.get_json()["next_cursor"]
+        if cursor is None:
+            break
+
+    assert ids == [3, 2, 1]
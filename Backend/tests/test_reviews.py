@@ -0,0 +1,177 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from database import db
+from models.Booking import Booking
+from models.RatingStats import RatingStats
+from models.Review import Review
+from models.RideOffer import RideOffer
+from models.enums import BookingStatus, UserRole
+
+
+@pytest.fixture
+def driver_token(mock_app):
+  with mock_app.app_context():
+    return create_access_token(identity="1", additional_claims={"id": "1", "role": UserRole.DRIVER})
+
+
+@pytest.fixture
+def passenger_token(mock_app):
+  with mock_app.app_context():
+    return create_access_token(identity="2", additional_claims={"id": "2", "role": UserRole.DEFAULT})
+
+
+@pytest.fixture
+def accepted_booking(mock_app):
+  with mock_app.app_context():
+    ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=1700000000, price=50,
+                     available_seats=3)
+    db.session.add(ride)
+    db.session.flush()
+    booking = Booking(ride_id=ride.id, passenger_id=2, status=BookingStatus.ACCEPTED)
+    db.session.add(booking)
+    db.session.commit()
+    return booking.id
+
+
+def test_create_review_updates_rating_stats(client, passenger_token, accepted_booking):
+  response = client.post("/reviews/create", json={"booking_id": accepted_booking, "rating": 4},
+                         headers={"Authorization": f"Bearer {passenger_token}"})
+  assert response.status_code == 201
+
+  stats = db.session.get(RatingStats, 1)
+  assert stats.review_count == 1
+  assert stats.rating_sum == 4
+  assert stats.histogram == [0, 0, 0, 1, 0]
+
+
+def test_delete_review_updates_rating_stats(client, passenger_token, driver_token, accepted_booking):
+  client.post("/reviews/create", json={"booking_id": accepted_booking, "rating": 5},
+              headers={"Authorization": f"Bearer {passenger_token}"})
+  client.post("/reviews/create", json={"booking_id": accepted_booking, "rating": 2},
+              headers={"Authorization": f"Bearer {driver_token}"})
+
+  review_id = Review.query.filter_by(reviewer_id=2).first().id
+  response = client.delete(f"/reviews/{review_id}", headers={"Authorization": f"Bearer {passenger_token}"})
+  assert response.status_code == 200
+
+  db.session.expire_all()
+  assert RatingStats.summary(1) == (0, 0)
+  assert RatingStats.summary(2) == (2, 1)
+
+
+def test_rebuild_rating_stats_reconciles_drift(mock_app, accepted_booking):
+  db.session.add_all([
+    Review(booking_id=accepted_booking, reviewer_id=2, reviewed_id=1, rating=3),
+    Review(booking_id=accepted_booking, reviewer_id=1, reviewed_id=2, rating=5),
+  ])
+  db.session.add(RatingStats(user_id=1, review_count=7, rating_sum=30))
+  db.session.commit()
+
+  assert RatingStats.rebuild() == 2
+  assert RatingStats.summary(1) == (3, 1)
+  assert db.session.get(RatingStats, 2).histogram == [0, 0, 0, 0, 1]
+
+
+def test_user_reviews_json_is_streamed_with_reviewers_joined(client, mock_app, passenger_token, query_counter):
+  from models.User import User
+
+  with mock_app.app_context():
+    for i in range(30):
+      reviewer = User(username=f"r{i}", email=f"r{i}@example.com", password="x", role=UserRole.DEFAULT,
+                      first_name="R", last_name=str(i))
+      ride = RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=1700000000 + i, price=50,
+                       available_seats=3)
+      db.session.add_all([reviewer, ride])
+      db.session.flush()
+      booking = Booking(ride_id=ride.id, passenger_id=reviewer.id, status=BookingStatus.ACCEPTED)
+      db.session.add(booking)
+      db.session.flush()
+      db.session.add(Review(booking_id=booking.id, reviewer_id=reviewer.id, reviewed_id=1, rating=1 + i % 5))
+    db.session.commit()
+
+  headers = {"Authorization": f"Bearer {passenger_token}"}
+  query_counter.clear()
+  response = client.get("/reviews/user/1", query_string={"format": "json", "limit": "all"}, headers=headers)
+
+  assert response.is_streamed
+  body = response.get_json()
+  assert len(body["reviews"]) == 30 and body["next_cursor"] is None
+  assert {review["reviewer"]["username"] for review in body["reviews"]} == {f"r{i}" for i in range(30)}
+  assert len(query_counter) <= 3
+
+  first = client.get("/reviews/user/1", query_string={"format": "json", "limit": 20}, headers=headers).get_json()
+  rest = client.get("/reviews/user/1", query_string={"format": "json", "cursor": first["next_cursor"]},
+                    headers=headers).get_json()
+  assert len(first["reviews"]) == 20 and len(rest["reviews"]) == 10 and rest["next_cursor"] is None
+
+
+@pytest.mark.parametrize("count", [1, 40])
+def test_my_reviews_runs_one_statement(client, mock_app, passenger_token, query_counter, count):
+  with mock_app.app_context():
+    for i in range(count):
+      ride = RideOffer(author_id=1, source="Iasi", destination=f"City{i}", departure_date=1700000000 + i, price=50,
+                       available_seats=3)
+      db.session.add(ride)
+      db.session.flush()
+      booking = Booking(ride_id=ride.id, passenger_id=2, status=BookingStatus.ACCEPTED)
+      db.session.add(booking)
+      db.session.flush()
+      db.session.add(Review(booking_id=booking.id, reviewer_id=2, reviewed_id=1, rating=4, comment=f"trip {i}"))
+    db.session.commit()
+
+  query_counter.clear()
+  response = client.get("/reviews/my", query_string={"format": "json", "limit": 100},
+                        headers={"Authorization": f"Bearer {passenger_token}"})
+
+  content = response.get_json()["content"]
+  assert len(content) == count
+  assert content[0]["booking_info"]["destination"] == f"City{count - 1}"
+  assert content[0]["reviewed_user"] == {"id": 1, "username": "driver", "first_name": "Driver", "last_name": "User"}
+  assert len(query_counter) == 1
+
+
+@pytest.mark.parametrize("native_on_conflict", [True, False])
+def test_duplicate_review_is_rejected_by_the_constraint(client, mock_app, passenger_token, accepted_booking,
+                                                        monkeypatch, native_on_conflict):
+  import database
+
+  if not native_on_conflict:
+    monkeypatch.setattr(database, "ON_CONFLICT_DIALECTS", {})
+  headers = {"Authorization": f"Bearer {passenger_token}"}
+
+  first = client.post("/reviews/create", json={"booking_id": accepted_booking, "rating": 4}, headers=headers)
+  second = client.post("/reviews/create", json={"booking_id": accepted_booking, "rating": 1}, headers=headers)
+
+  assert first.status_code == 201 and first.get_json()["review"]["rating"] == 4
+  assert second.status_code == 400 and second.get_json()["message"] == "You have already reviewed this booking"
+  with mock_app.app_context():
+    assert RatingStats.summary(1) == (4, 1)
+
+
+@pytest.mark.parametrize("native_on_conflict", [True, False])
+def test_rating_stats_record_creates_the_row_once(mock_app, monkeypatch, native_on_conflict):
+  import database
+
+  if not native_on_conflict:
+    monkeypatch.setattr(database, "ON_CONFLICT_DIALECTS", {})
+
+  with mock_app.app_context():
+    assert db.session.get(RatingStats, 1) is None
+    RatingStats.record(1, 4)
+    RatingStats.record(1, 5)
+    db.session.commit()
+
+    stats = db.session.get(RatingStats, 1)
+    assert (stats.review_count, stats.rating_sum) == (2, 9)
+    assert stats.histogram == [0, 0, 0, 1, 1]
+
+
+@pytest.mark.parametrize("rating", [4.5, "4", True])
+def test_create_review_requires_a_whole_number(client, mock_app, passenger_token, accepted_booking, rating):
+  response = client.post("/reviews/create", json={"booking_id": accepted_booking, "rating": rating},
+                         headers={"Authorization": f"Bearer {passenger_token}"})
+
+  assert response.status_code == 400
+  assert response.get_json()["message"] == "rating must be a whole number"
+  with mock_app.app_context():
+    assert Review.query.count() == 0
@@ -160,4 +160,284 @@ def test_book_ride_not_found(client, passenger_token):
     data = response.get_json()
     assert response.status_code == 404
     assert data["status"] == "error"
-    assert "not found" in data["message"].lower()
\ No newline at end of file
+    assert "not found" in data["message"].lower()
+
+def _search_ride_cards(rides, **_context):
+    # Touch everything the results template reads so lazy loads would show up in the query count.
+    for ride, _date, _booked, _avg, _total in rides:
+        _ = (ride["author"]["first_name"], ride["author"]["last_name"], ride["price"], ride["available_seats"])
+    return "OK"
+
+
+@pytest.mark.parametrize("ride_count", [1, 25])
+def test_search_results_constant_query_count(client, mock_app, passenger_token, query_counter, ride_count):
+    from datetime import datetime
+    from unittest.mock import patch
+    from models.Booking import Booking
+    from models.Review import Review
+    from models.RatingStats import RatingStats
+    from models.User import User
+
+    departure = int(datetime(2030, 1, 1, 10, 0).timestamp())
+    with mock_app.app_context():
+        for i in range(ride_count):
+            driver = User(username=f"drv{i}", email=f"drv{i}@example.com", password="x", role=UserRole.DRIVER,
+                          first_name="Drv", last_name=str(i))
+            db.session.add(driver)
+            db.session.flush()
+            ride = RideOffer(author_id=driver.id, source="Iasi", destination="Cluj", departure_date=departure + i,
+                             price=50, available_seats=3)
+            db.session.add(ride)
+            db.session.flush()
+            booking = Booking(ride_id=ride.id, passenger_id=2, status="accepted")
+            db.session.add(booking)
+            db.session.flush()
+            db.session.add(Review(booking_id=booking.id, reviewer_id=2, reviewed_id=driver.id, rating=4))
+        db.session.commit()
+        RatingStats.rebuild()
+
+    captured = {}
+
+    def fake_render(template, **context):
+        captured.update(context)
+        return _search_ride_cards(**context)
+
+    query_counter.clear()
+    with patch("blueprints.Rides.render_template", side_effect=fake_render), \
+         patch("blueprints.Rides.FetchCities.get_location", return_value=(45.0, 25.0)):
+        response = client.post("/rides/search", data={"from_city": "Iasi", "to_city": "Cluj", "date": "2030-01-01"},
+                               headers={"Authorization": f"Bearer {passenger_token}"})
+
+    assert response.status_code == 200
+    assert len(captured["rides"]) == ride_count
+    assert all(total == 1 and avg == 4 for _r, _d, _b, avg, total in captured["rides"])
+    assert len(query_counter) <= 3
+
+
+def _add_route_rides(mock_app, count, day=(2030, 1, 2)):
+    from datetime import datetime
+
+    start = int(datetime(*day, 8, 0).timestamp())
+    with mock_app.app_context():
+        for i in range(count):
+            db.session.add(RideOffer(author_id=1, source="Iasi", destination="Brasov", departure_date=start + 60 * (i % 4),
+                                     price=10 + (i * 7) % 5, available_seats=1 + i % 3))
+        db.session.commit()
+
+
+def test_search_api_keyset_pagination(client, mock_app, passenger_token):
+    _add_route_rides(mock_app, 11)
+
+    seen, cursor = [], None
+    while True:
+        params = {"from_city": "Iasi", "to_city": "Brasov", "date": "2030-01-02", "limit": 4}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/rides/api/search", query_string=params,
+                              headers={"Authorization": f"Bearer {passenger_token}"})
+        assert response.status_code == 200
+        body = response.get_json()
+        seen += body["content"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    keys = [(r["departure_date"], r["id"]) for r in seen]
+    assert len(seen) == 11
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 11
+
+
+def test_search_api_filters_and_price_sort(client, mock_app, passenger_token):
+    _add_route_rides(mock_app, 10)
+
+    response = client.get("/rides/api/search",
+                          query_string={"from_city": "Iasi", "to_city": "Brasov", "date": "2030-01-02",
+                                        "min_price": 11, "max_price": 13, "min_seats": 2, "sort": "price_desc"},
+                          headers={"Authorization": f"Bearer {passenger_token}"})
+    content = response.get_json()["content"]
+
+    assert response.status_code == 200
+    assert content
+    assert all(11 <= r["price"] <= 13 and r["available_seats"] >= 2 for r in content)
+    assert [r["price"] for r in content] == sorted((r["price"] for r in content), reverse=True)
+
+
+def test_search_api_rejects_bad_cursor(client, passenger_token):
+    response = client.get("/rides/api/search",
+                          query_string={"from_city": "Iasi", "to_city": "Brasov", "cursor": "not-a-cursor"},
+                          headers={"Authorization": f"Bearer {passenger_token}"})
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def _search(client, token, from_city="Iasi", to_city="Cluj", day="2030-01-01"):
+    from unittest.mock import patch
+
+    captured = {}
+
+    def fake_render(template, **context):
+        captured.update(context)
+        return "OK"
+
+    with patch("blueprints.Rides.render_template", side_effect=fake_render), \
+         patch("blueprints.Rides.FetchCities.get_location", return_value=(45.0, 25.0)):
+        client.post("/rides/search", data={"from_city": from_city, "to_city": to_city, "date": day},
+                    headers={"Authorization": f"Bearer {token}"})
+    return captured["rides"]
+
+
+def test_search_cache_hits_and_invalidates_on_create(client, mock_app, driver_token, passenger_token):
+    from datetime import datetime
+    from SearchCache import RIDE_SEARCH_CACHE
+
+    departure = int(datetime(2030, 1, 1, 9, 0).timestamp())
+    payload = {"source": "Iasi", "destination": "Cluj", "departure_date": departure, "price": 40, "available_seats": 2}
+    client.post("/rides/create", json=payload, headers={"Authorization": f"Bearer {driver_token}"})
+
+    assert len(_search(client, passenger_token)) == 1
+    assert len(_search(client, passenger_token)) == 1
+    assert RIDE_SEARCH_CACHE.stats()["hits"] == 1
+
+    client.post("/rides/create", json={**payload, "departure_date": departure + 3600},
+                headers={"Authorization": f"Bearer {driver_token}"})
+    assert len(_search(client, passenger_token)) == 2
+
+    # A ride on another day leaves the cached entry alone.
+    client.post("/rides/create", json={**payload, "departure_date": departure + 86400},
+                headers={"Authorization": f"Bearer {driver_token}"})
+    assert len(_search(client, passenger_token)) == 2
+    assert RIDE_SEARCH_CACHE.stats()["hits"] == 2
+
+
+def test_search_cache_overlays_booked_flag_per_user(client, mock_app, driver_token, passenger_token):
+    from datetime import datetime
+
+    departure = int(datetime(2030, 1, 1, 9, 0).timestamp())
+    payload = {"source": "Iasi", "destination": "Cluj", "departure_date": departure, "price": 40, "available_seats": 2}
+    ride_id = client.post("/rides/create", json=payload,
+                          headers={"Authorization": f"Bearer {driver_token}"}).get_json()["content"]["id"]
+
+    assert _search(client, driver_token)[0][2] is False
+    client.post(f"/bookings/request/{ride_id}", headers={"Authorization": f"Bearer {passenger_token}"})
+    assert _search(client, passenger_token)[0][2] is True
+    assert _search(client, driver_token)[0][2] is False
+
+
+def test_search_cache_lru_ttl_and_generations():
+    from SearchCache import SearchCache
+
+    now = [0.0]
+    cache = SearchCache(max_entries=2, ttl=10, clock=lambda: now[0])
+
+    for key in ("a", "b"):
+        _value, generation = cache.get(key)
+        cache.put(key, key.upper(), generation)
+    cache.get("a")
+    cache.put("c", "C", cache.get("c")[1])
+    assert cache.get("b")[0] is None
+    assert cache.get("a")[0] == "A"
+
+    now[0] = 11
+    assert cache.get("a")[0] is None
+
+    # A value computed before an invalidation is discarded.
+    _value, generation = cache.get("a")
+    cache.invalidate("a")
+    cache.put("a", "stale", generation)
+    assert cache.get("a")[0] is None
+
+
+def test_geo_grid_radius_query():
+    from GeoIndex import GeoGrid
+    from conftest import TEST_LOCATIONS
+
+    grid = GeoGrid()
+    for name, (lat, lon) in TEST_LOCATIONS.items():
+        grid.add(name, lat, lon)
+
+    near_iasi = grid.within(*TEST_LOCATIONS["Iasi"], 30)
+    assert [name for name, _ in near_iasi] == ["Iasi", "Podu Iloaiei"]
+    assert 20 < near_iasi[1][1] < 30
+    assert grid.within(*TEST_LOCATIONS["Iasi"], 5) == [("Iasi", 0.0)]
+
+
+def test_search_with_radius_ranks_by_detour(client, mock_app, passenger_token):
+    from datetime import datetime
+    from unittest.mock import patch
+    import FetchCities
+
+    for city in ("Iasi", "Podu Iloaiei", "Cluj", "Floresti"):
+        FetchCities.index_place(city, "Romania")
+
+    departure = int(datetime(2030, 1, 3, 9, 0).timestamp())
+    with mock_app.app_context():
+        db.session.add_all([
+            RideOffer(author_id=1, source="Podu Iloaiei", destination="Floresti", departure_date=departure, price=60,
+                      available_seats=2),
+            RideOffer(author_id=1, source="Iasi", destination="Floresti", departure_date=departure + 60, price=60,
+                      available_seats=2),
+            RideOffer(author_id=1, source="Bucuresti", destination="Cluj", departure_date=departure, price=60,
+                      available_seats=2),
+        ])
+        db.session.commit()
+
+    captured = {}
+
+    def fake_render(template, **context):
+        captured.update(context)
+        return "OK"
+
+    with patch("blueprints.Rides.render_template", side_effect=fake_render):
+        client.post("/rides/search", data={"from_city": "Iasi", "to_city": "Cluj", "date": "2030-01-03", "radius": 50},
+                    headers={"Authorization": f"Bearer {passenger_token}"})
+
+    found = [(ride["source"], ride["destination"]) for ride, *_ in captured["rides"]]
+    assert found == [("Iasi", "Floresti"), ("Podu Iloaiei", "Floresti")]
+    assert captured["rides"][0][0]["detour_km"] < captured["rides"][1][0]["detour_km"]
+
+
+def test_search_api_with_radius_pages_by_detour(client, mock_app, passenger_token):
+    from datetime import datetime
+    import FetchCities
+
+    for city in ("Iasi", "Podu Iloaiei", "Cluj", "Floresti"):
+        FetchCities.index_place(city, "Romania")
+
+    departure = int(datetime(2030, 1, 3, 9, 0).timestamp())
+    with mock_app.app_context():
+        # The farther ride leaves first, so departure order would list it first.
+        db.session.add_all([
+            RideOffer(author_id=1, source="Podu Iloaiei", destination="Floresti", departure_date=departure, price=60,
+                      available_seats=2),
+            RideOffer(author_id=1, source="Iasi", destination="Floresti", departure_date=departure + 60, price=60,
+                      available_seats=2),
+            RideOffer(author_id=1, source="Iasi", destination="Cluj", departure_date=departure + 120, price=60,
+                      available_seats=2),
+        ])
+        db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"from_city": "Iasi", "to_city": "Cluj", "date": "2030-01-03", "radius_km": 50, "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/rides/api/search", query_string=params,
+                          headers={"Authorization": f"Bearer {passenger_token}"}).get_json()
+        seen += body["content"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [(r["source"], r["destination"]) for r in seen] == [
+        ("Iasi", "Cluj"), ("Iasi", "Floresti"), ("Podu Iloaiei", "Floresti")]
+    assert [r["detour_km"] for r in seen] == sorted(r["detour_km"] for r in seen)
+
+
+def test_created_ride_is_indexed_before_the_request_returns(client, driver_token):
+    import FetchCities
+
+    client.post("/rides/create", json={"source": "Iasi", "destination": "Cluj", "departure_date": 4102444800,
+                                       "price": 40, "available_seats": 2},
+                headers={"Authorization": f"Bearer {driver_token}"})
+    assert FetchCities.PLACE_INDEX.location("Cluj") is not None
@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from flask_jwt_extended import create_access_token
+
+from models.enums import UserRole
+from UserCache import USER_CACHE, UserCache, load_user
+
+
+def _profile(client, headers):
+    captured = {}
+
+    def fake_render(template, **context):
+        captured.update(context)
+        return "OK"
+
+    with patch("blueprints.UserProfile.render_template", side_effect=fake_render):
+        assert client.get("/profile", headers=headers).status_code == 200
+    return captured["user"]
+
+
+def _user_selects(statements):
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+def test_profile_reads_the_user_once_per_process(client, auth_headers, query_counter):
+    query_counter.clear()
+    assert _profile(client, auth_headers).first_name == "Passenger"
+    assert _profile(client, auth_headers).first_name == "Passenger"
+
+    assert len(_user_selects(query_counter)) == 1
+    assert USER_CACHE.stats()["db_lookups_saved"] == 1
+
+
+def test_profile_update_invalidates_the_cached_user(client, auth_headers):
+    assert _profile(client, auth_headers).first_name == "Passenger"
+
+    with patch("blueprints.UserProfile.render_template", return_value="OK"):
+        response = client.post("/profile", headers=auth_headers, data={
+            "first_name": "Renamed", "last_name": "User", "email": "passenger@example.com"})
+    assert response.status_code == 200
+
+    assert _profile(client, auth_headers).first_name == "Renamed"
+    assert USER_CACHE.stats()["invalidations"] == 1
+
+
+def test_become_driver_refreshes_the_cached_role(client, mock_app, auth_headers, user):
+    from tests.test_become_driver import VALID_DRIVER_DATA
+
+    with mock_app.app_context():
+        assert load_user(user.id).role == UserRole.DEFAULT
+
+    response = client.post("/driver/becomeDriver", json=VALID_DRIVER_DATA, headers=auth_headers)
+    assert response.status_code == 201
+
+    with mock_app.app_context():
+        assert load_user(user.id).is_driver()
+
+
+def test_user_cache_stats_are_admin_only(client, mock_app, auth_headers):
+    assert client.get("/profile/cache", headers=auth_headers).status_code == 403
+
+    with mock_app.app_context():
+        token = create_access_token(identity="1", additional_claims={"role": UserRole.ADMIN})
+    response = client.get("/profile/cache", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert {"hits", "misses", "request_hits", "db_lookups_saved"} <= response.get_json()["content"].keys()
+
+
+def test_user_cache_expires_entries():
+    now = [0.0]
+    cache = UserCache(max_entries=2, ttl=10, clock=lambda: now[0])
+
+    _, generation = cache.get(1)
+    cache.put(1, "user", generation)
+    assert cache.get(1)[0] == "user"
+
+    now[0] = 11
+    assert cache.get(1)[0] is None
+    assert cache.stats()["db_lookups_saved"] == 1